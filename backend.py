@@ -0,0 +1,293 @@
+# backend.py
+# Backend submit stock-in: "selenium" (browser, lewat submit_row) atau "http" (langsung ke API Knack).
+
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import location_index
+import logger
+import metrics
+import screenshots
+from driver_pool import is_healthy
+from helper import get_status_value
+
+# === CONFIG ===
+KNACK_API_URL = "https://api.knack.com/v1"
+KNACK_SCENE = "scene_1"
+KNACK_VIEW = "view_1726"
+LOCATION_FIELD = "field_932"
+STATUS_FIELD = "field_961"
+RENTAL_FIELD = "field_1037"
+
+
+class SubmitError(Exception):
+    pass
+
+
+class SubmitUncertain(SubmitError):
+    # Gagal setelah submit mungkin sudah sampai Knack: jangan diulang otomatis, cek manual dulu
+    pass
+
+
+class SessionExpired(SubmitError):
+    # Session Knack habis (HTTP 401 / form login muncul lagi): login ulang, row dijadwalkan ulang
+    pass
+
+
+class SubmitBackend:
+    name = "base"
+    credentials = None
+
+    def login(self, email, password):
+        raise NotImplementedError
+
+    def submit(self, row):
+        raise NotImplementedError
+
+    def location_names(self):
+        # Nama lokasi yang ada di Knack, None kalau backend tidak tahu
+        return None
+
+    def reauthenticate(self):
+        # Login ulang pakai akun terakhir, return False kalau gagal (row tetap dijadwalkan ulang)
+        if not self.credentials:
+            return False
+        logger.log(f"[backend] 🔑 Session Knack habis, login ulang ({self.name})", "WARNING", step="login")
+        try:
+            ok = self.login(*self.credentials)
+        except Exception as e:
+            logger.log(f"[backend] ❌ Login ulang gagal: {type(e).__name__} - {e}", "ERROR", step="login")
+            return False
+        if not ok:
+            logger.log("[backend] ❌ Login ulang gagal", "ERROR", step="login")
+        return ok
+
+    # Hook per row (screenshot dll), default tidak ngapa-ngapain
+    def begin_row(self, row_idx):
+        pass
+
+    def row_failed(self):
+        pass
+
+    def row_succeeded(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SeleniumBackend(SubmitBackend):
+    name = "selenium"
+
+    def __init__(self, driver, submit_func, login_func, url, recorder=None, pool=None):
+        self.driver = driver
+        self.submit_func = submit_func
+        self.login_func = login_func
+        self.url = url
+        self.recorder = recorder
+        self.pool = pool
+        self.credentials = None
+
+    def login(self, email, password):
+        self.credentials = (email, password)
+        return self.login_func(self.driver, self.url, email, password)
+
+    def _recycle(self, reason):
+        # Ganti browser crash / kebanyakan row dengan yang baru dari pool, lalu login ulang.
+        # Dipanggil dari hook row: error tidak dilempar, biar thread submit tetap jalan
+        logger.log(f"[backend] ♻️ Recycle browser: {reason}", "WARNING")
+        old = self.driver
+        try:
+            self.driver = self.pool.recycle(old)
+        except Exception as e:
+            # Row berikutnya gagal di browser lama → row_failed coba recycle lagi
+            logger.log(f"[backend] ❌ Browser baru gagal dibuka: {type(e).__name__} - {e}", "ERROR")
+            return
+        screenshots.rebind(old, self.driver)
+        try:
+            ok = self.login(*self.credentials)
+        except Exception as e:
+            logger.log(f"[backend] ❌ Login error setelah recycle: {type(e).__name__} - {e}", "ERROR")
+            ok = False
+        if not ok:
+            # Form login muncul di row berikutnya → SessionExpired → login ulang lagi
+            logger.log("[backend] ❌ Login ulang gagal setelah recycle browser", "ERROR")
+
+    def submit(self, row):
+        try:
+            return self.submit_func(self.driver, row)
+        except SubmitUncertain:
+            raise
+        except Exception as e:
+            if self._login_form_visible():
+                raise SessionExpired(f"Form login Knack muncul saat submit ({type(e).__name__} - {e})") from e
+            raise
+
+    def _login_form_visible(self):
+        try:
+            return bool(self.driver.execute_script(
+                "const p = document.querySelector('input[type=\"password\"]'); return !!(p && p.offsetParent);"
+            ))
+        except Exception:
+            return False
+
+    def location_names(self):
+        index = location_index.index_for(self.driver)
+        if not index.options:
+            index.build(self.driver)
+        return index.labels
+
+    def begin_row(self, row_idx):
+        if self.recorder:
+            self.recorder.begin_row(row_idx)
+
+    def row_failed(self):
+        if self.recorder:
+            self.recorder.row_failed(self.driver)
+        if self.pool and not is_healthy(self.driver):
+            self._recycle("browser tidak merespon")
+        elif self.pool:
+            self._maybe_recycle()
+
+    def row_succeeded(self):
+        if self.recorder:
+            self.recorder.row_succeeded()
+        if self.pool:
+            self._maybe_recycle()
+
+    def _maybe_recycle(self):
+        reason = self.pool.note_row(self.driver)
+        if reason:
+            self._recycle(reason)
+
+
+class HttpBackend(SubmitBackend):
+    name = "http"
+
+    def __init__(self, app_id, api_url=KNACK_API_URL, scene=KNACK_SCENE, view=KNACK_VIEW,
+                 timeout=15, pool_size=10):
+        self.app_id = app_id
+        self.api_url = api_url.rstrip("/")
+        self.scene = scene
+        self.view = view
+        self.timeout = timeout
+        self.token = None
+        self.location_ids = {}
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                      allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "X-Knack-Application-Id": app_id,
+            "X-Knack-REST-API-Key": "knack",
+            "Content-Type": "application/json",
+        })
+
+    @classmethod
+    def from_env(cls):
+        app_id = os.getenv("KNACK_APP_ID")
+        if not app_id:
+            return None
+        return cls(
+            app_id,
+            api_url=os.getenv("KNACK_API_URL") or KNACK_API_URL,
+            scene=os.getenv("KNACK_SCENE") or KNACK_SCENE,
+            view=os.getenv("KNACK_VIEW") or KNACK_VIEW,
+        )
+
+    def _url(self, path):
+        return f"{self.api_url}{path}"
+
+    @metrics.timed("login")
+    def login(self, email, password):
+        self.credentials = (email, password)
+        try:
+            resp = self.session.post(
+                self._url(f"/applications/{self.app_id}/session"),
+                json={"email": email, "password": password},
+                timeout=self.timeout,
+            )
+            if resp.status_code != 200:
+                logger.log(f"[backend] ❌ Login API gagal: HTTP {resp.status_code}", "ERROR", step="login")
+                return False
+            self.token = resp.json()["session"]["user"]["token"]
+            self.session.headers["Authorization"] = self.token
+            return True
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.log(f"[backend] ❌ Login API gagal: {type(e).__name__} - {e}", "ERROR", step="login")
+            return False
+
+    def _connection_options(self, field, search=None):
+        params = {"rows_per_page": 1000}
+        if search:
+            params["search"] = search
+        resp = self.session.get(
+            self._url(f"/scenes/{self.scene}/views/{self.view}/connections/{field}"),
+            params=params,
+            timeout=self.timeout,
+        )
+        if resp.status_code == 401:
+            raise SessionExpired(f"Session API Knack habis saat ambil opsi {field} (HTTP 401)")
+        if resp.status_code != 200:
+            raise SubmitError(f"Gagal ambil opsi {field}: HTTP {resp.status_code}")
+        return resp.json().get("records", [])
+
+    def _load_locations(self):
+        if not self.location_ids:
+            with metrics.step("location"):
+                for rec in self._connection_options(LOCATION_FIELD):
+                    self.location_ids[rec["identifier"]] = rec["id"]
+        return self.location_ids
+
+    def location_names(self):
+        return list(self._load_locations())
+
+    def location_id(self, location):
+        self._load_locations()
+        rec_id = self.location_ids.get(location)
+        if not rec_id:
+            raise ValueError(f"❌ Location '{location}' tidak ditemukan di Knack.")
+        return rec_id
+
+    def rental_id(self, imei):
+        with metrics.step("imei_suggestion"):
+            for rec in self._connection_options(RENTAL_FIELD, search=imei):
+                if str(rec["identifier"]).strip() == imei:
+                    return rec["id"]
+            raise SubmitError(f"IMEI {imei} tidak ditemukan di Knack")
+
+    def submit(self, row):
+        location = str(row["Location"])
+        imei = str(row["IMEI"]).strip()
+        status_value = get_status_value(str(row["Status"]))
+
+        payload = {
+            LOCATION_FIELD: [self.location_id(location)],
+            STATUS_FIELD: status_value,
+            RENTAL_FIELD: [self.rental_id(imei)],
+        }
+        with metrics.step("submit"):
+            try:
+                resp = self.session.post(
+                    self._url(f"/pages/{self.scene}/views/{self.view}/records"),
+                    json=payload,
+                    timeout=self.timeout,
+                )
+            except requests.ConnectTimeout:
+                raise
+            except requests.RequestException as e:
+                # Request mungkin sudah diterima Knack sebelum koneksi putus / timeout
+                raise SubmitUncertain(f"Submit API tidak ada respon: {type(e).__name__} - {e}") from e
+            if resp.status_code == 401:
+                raise SessionExpired("Session API Knack habis saat submit (HTTP 401)")
+            if resp.status_code not in (200, 201):
+                raise SubmitError(f"Submit API gagal: HTTP {resp.status_code} - {resp.text[:200]}")
+        return True
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,223 @@
+# benchmark.py
+# Benchmark end-to-end offline: knack_stub (API + replika form view_1726) + fake_sheets (gspread in-memory).
+# Contoh:
+#   python benchmark.py --rows 500 --workers 5 --backend http --latency-submit 150
+#   python benchmark.py --rows 50 --workers 2 --backend selenium --mode dispatcher
+# Output: rows/sec, persentil latency per step, RSS browser, jumlah call Sheets API.
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import knack_stub
+from fake_sheets import FakeClient, make_worker_spreadsheet
+
+BENCH_URL = "fake://benchmark"
+
+
+class StepTimer:
+    # Bungkus fungsi (atribut modul / class) dan catat durasi tiap panggilan per step
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def record(self, step, seconds):
+        with self.lock:
+            self.samples[step].append(seconds)
+
+    def wrap(self, owner, attr, step):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(step, time.perf_counter() - started)
+
+        setattr(owner, attr, timed)
+
+    def percentiles(self):
+        out = {}
+        with self.lock:
+            for step, values in sorted(self.samples.items()):
+                values = sorted(values)
+
+                def pct(p):
+                    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+                out[step] = {"count": len(values), "p50_ms": pct(50) * 1000,
+                             "p90_ms": pct(90) * 1000, "p99_ms": pct(99) * 1000}
+        return out
+
+
+def instrument(worker, timer, backend_kind):
+    import backend
+    import sheet_reader
+    import sheet_writer
+    timer.wrap(sheet_reader.IncrementalSheetReader, "poll", "sheets_poll")
+    timer.wrap(sheet_writer.SheetWriteBuffer, "flush", "sheets_write")
+    if backend_kind == "http":
+        timer.wrap(backend.HttpBackend, "login", "login")
+        timer.wrap(backend.HttpBackend, "location_id", "location")
+        timer.wrap(backend.HttpBackend, "rental_id", "imei_lookup")
+        timer.wrap(backend.HttpBackend, "submit", "row_total")
+    else:
+        import fast_fill
+        timer.wrap(worker, "login_knack_cached", "login")
+        timer.wrap(fast_fill, "fill", "fast_fill")
+        timer.wrap(worker, "select_chosen_option", "location")
+        timer.wrap(worker, "select_dropdown_by_value", "status")
+        timer.wrap(worker, "force_input", "imei_input")
+        timer.wrap(worker, "click_suggestion", "imei_suggestion")
+        timer.wrap(worker, "submit_row", "row_total")
+
+
+def count_finished(spreadsheet):
+    done = total = 0
+    for ws in spreadsheet.sheets.values():
+        header = ws.data[0]
+        if "Logs" not in header:
+            total += len(ws.data) - 1
+            continue
+        logs_idx = header.index("Logs")
+        for row in ws.data[1:]:
+            total += 1
+            if len(row) > logs_idx and row[logs_idx]:
+                done += 1
+    return done, total
+
+
+def run_worker_mode(worker, spreadsheet, names, stop_event):
+    # Sama seperti proses supervisor, tapi thread per sheet biar bisa diukur dalam satu proses
+    from sheet_reader import IncrementalSheetReader
+
+    def one(sheet_name):
+        sheet = worker.get_or_create_sheet(spreadsheet, sheet_name)
+        headers = worker.ensure_log_columns(sheet)
+        email, password = worker.get_knack_account(sheet)
+        reader = IncrementalSheetReader(sheet, headers)
+        writer = worker.result_writer(sheet, sheet_name, headers.index("Logs") + 1,
+                                      headers.index("TimeStamp") + 1)
+        try:
+            worker.reconcile_sheet(reader, sheet_name, writer)
+            if worker.SUBMIT_BACKEND == "http":
+                if worker.run_http_backend(reader, sheet_name, email, password, writer, stop_event):
+                    return
+            worker.run_selenium_backend(reader, sheet_name, email, password, writer, stop_event)
+        finally:
+            writer.close()
+
+    threads = [threading.Thread(target=one, args=(name,), daemon=True) for name in names]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def run_dispatcher_mode(worker, spreadsheet, names, stop_event):
+    import dispatcher
+    d = dispatcher.Dispatcher(spreadsheet, names, backend_kind=worker.SUBMIT_BACKEND)
+    d.stop_event = stop_event
+    t = threading.Thread(target=d.run, daemon=True)
+    t.start()
+    return [t]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline worker stock-in")
+    parser.add_argument("--rows", type=int, default=200, help="Jumlah row per worker sheet")
+    parser.add_argument("--workers", type=int, default=5, help="Jumlah worker sheet / akun")
+    parser.add_argument("--backend", choices=["http", "selenium"], default="http")
+    parser.add_argument("--mode", choices=["worker", "dispatcher"], default="worker")
+    parser.add_argument("--sheets-latency", type=float, default=0.0, help="Delay per call Sheets API (ms)")
+    for key in knack_stub.LATENCY_KEYS:
+        parser.add_argument(f"--latency-{key}", type=float, default=0.0, help=f"Delay Knack {key} (ms)")
+    parser.add_argument("--timeout", type=float, default=600, help="Batas waktu benchmark (detik)")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    latency = {key: getattr(args, f"latency_{key}") / 1000 for key in knack_stub.LATENCY_KEYS}
+    server, state = knack_stub.serve(knack_stub.KnackStubState(latency=latency))
+    base = knack_stub.base_url(server)
+
+    # Env harus di-set sebelum import worker
+    os.environ.update({
+        "SUBMIT_BACKEND": args.backend,
+        "FORM_URL": f"{base}/",
+        "KNACK_APP_ID": knack_stub.STUB_APP_ID,
+        "KNACK_API_URL": f"{base}/v1",
+        "POLL_INTERVAL": "0.5",
+        "DRIVER_POOL_SIZE": str(args.workers),
+        "LOG_FILE": "benchmark_log.txt",
+        # Ledger baru tiap run, kalau tidak semua IMEI dianggap sudah disubmit
+        "LEDGER_PATH": os.path.join(tempfile.mkdtemp(prefix="bench_ledger_"), "ledger.sqlite3"),
+        "METRICS_DIR": tempfile.mkdtemp(prefix="bench_metrics_"),
+    })
+    os.environ.setdefault("LOG_CONSOLE", "0")
+    import worker
+
+    client = FakeClient(latency=args.sheets_latency / 1000)
+    spreadsheet = make_worker_spreadsheet(client, args.workers, args.rows, url=BENCH_URL)
+    names = list(spreadsheet.sheets)
+
+    timer = StepTimer()
+    instrument(worker, timer, args.backend)
+
+    stop_event = threading.Event()
+    rss_samples = []
+    started = time.monotonic()
+    runner = run_dispatcher_mode if args.mode == "dispatcher" else run_worker_mode
+    threads = runner(worker, spreadsheet, names, stop_event)
+
+    done, total = 0, args.rows * args.workers
+    while time.monotonic() - started < args.timeout:
+        done, total = count_finished(spreadsheet)
+        with worker.driver_pool.cond:
+            drivers = list(worker.driver_pool.busy)
+        if drivers:
+            from driver_pool import browser_rss
+            rss_samples.append(sum(browser_rss(d) for d in drivers))
+        if done >= total:
+            break
+        time.sleep(0.2)
+    elapsed = time.monotonic() - started
+    stop_event.set()
+    for t in threads:
+        t.join(timeout=30)
+    server.shutdown()
+
+    result = {
+        "backend": args.backend,
+        "mode": args.mode,
+        "workers": args.workers,
+        "rows_total": total,
+        "rows_done": done,
+        "knack_records": len(state.records),
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(done / elapsed, 2) if elapsed else 0.0,
+        "steps": timer.percentiles(),
+        "browser_rss_mb": {
+            "max": round(max(rss_samples, default=0) / 1024 / 1024, 1),
+            "mean": round(sum(rss_samples) / len(rss_samples) / 1024 / 1024, 1) if rss_samples else 0.0,
+        },
+        "sheets_api_calls": {"total": client.total_calls(), **dict(client.calls)},
+    }
+
+    print(f"Backend {args.backend} / mode {args.mode}: {done}/{total} row dalam {elapsed:.1f}s "
+          f"→ {result['rows_per_sec']} rows/sec (record Knack: {len(state.records)})")
+    print(f"{'step':<18}{'n':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for step, stats in result["steps"].items():
+        print(f"{step:<18}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    print(f"Browser RSS: max {result['browser_rss_mb']['max']} MB, rata-rata {result['browser_rss_mb']['mean']} MB")
+    print("Sheets API calls: " + ", ".join(f"{k}={v}" for k, v in result["sheets_api_calls"].items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# dispatcher.py
+# Dispatcher pusat: row pending dari semua worker sheet masuk satu antrian bersama,
+# di-dedup per IMEI (satu row per IMEI yang antri / diproses), lalu diambil session (browser/API)
+# mana saja yang sedang kosong. Duplikat setelah row pertama selesai diputuskan ledger (⛔ Duplikat IMEI).
+# Hasil tetap ditulis ke sheet + row asalnya.
+# Jalankan: python dispatcher.py   (WORKER_SHEETS / discovery sama seperti supervisor)
+
+import os
+import queue
+import signal
+import threading
+from itertools import zip_longest
+
+import logger
+import metrics
+from driver_pool import browser_capacity
+from sheet_reader import IncrementalSheetReader
+from sheet_writer import install_shutdown_hooks
+from supervisor import discover_worker_sheets
+
+
+class SheetSource:
+    def __init__(self, name, sheet, reader, writer, email, password):
+        self.name = name
+        self.sheet = sheet
+        self.reader = reader
+        self.writer = writer
+        self.email = email
+        self.password = password
+
+
+class Dispatcher:
+    def __init__(self, spreadsheet, sheet_names, backend_kind="selenium", poll_interval=None):
+        import worker
+        self.worker = worker
+        self.log = worker.log
+        self.spreadsheet = spreadsheet
+        self.sheet_names = sheet_names
+        self.backend_kind = backend_kind
+        self.poll_interval = float(poll_interval or os.getenv("POLL_INTERVAL") or 10)
+        self.sources = {}
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.in_flight = set()  # (sheet, row) yang sedang antri / diproses
+        self.imei_owner = {}  # IMEI → (sheet, row) yang sedang antri / diproses
+        self.stop_event = threading.Event()
+
+    def open_sources(self):
+        for name in self.sheet_names:
+            sheet = self.worker.get_or_create_sheet(self.spreadsheet, name)
+            headers = self.worker.ensure_log_columns(sheet)
+            logs_col = headers.index("Logs") + 1
+            ts_col = headers.index("TimeStamp") + 1
+            email, password = self.worker.get_knack_account(sheet)
+            source = SheetSource(
+                name, sheet,
+                IncrementalSheetReader(sheet, headers),
+                self.worker.result_writer(sheet, name, logs_col, ts_col),
+                email, password,
+            )
+            self.worker.reconcile_sheet(source.reader, name, source.writer)
+            self.sources[name] = source
+
+    # === Collector ===
+    def collect(self):
+        # Flush dulu semua hasil, baru poll → row yang sudah selesai tidak ke-antri ulang.
+        # Flush & poll (network) di luar self.lock; hasil yang belum masuk sheet dicek lewat writer.has_pending
+        for source in self.sources.values():
+            source.writer.flush()
+        per_sheet = []
+        for source in self.sources.values():
+            try:
+                rows = source.reader.poll()
+            except Exception as e:
+                self.log(f"[{source.name}] ⚠️ Poll gagal: {type(e).__name__} - {e}", "WARNING")
+                continue
+            rows = self.worker.select_rows(source.name, source.writer, rows)
+            per_sheet.append([(source, idx, row) for idx, row in rows])
+
+        added = 0
+        with self.lock:
+            # Round-robin antar sheet biar antrian tidak didominasi satu sheet
+            for batch in zip_longest(*per_sheet):
+                for item in batch:
+                    if item is None:
+                        continue
+                    source, idx, row = item
+                    imei = str(row.get("IMEI", "")).strip()
+                    key = (source.name, idx)
+                    if not imei or key in self.in_flight or source.writer.has_pending(idx):
+                        continue
+                    if imei in self.imei_owner:
+                        # IMEI yang sama sedang antri / diproses dari row lain: tunggu hasilnya,
+                        # pass berikutnya ledger yang menandai duplikat (atau submit kalau row pertama gagal)
+                        continue
+                    self.in_flight.add(key)
+                    self.imei_owner[imei] = key
+                    self.queue.put((source.name, idx, row))
+                    added += 1
+        metrics.queue_depth(self.queue.qsize(), worker="dispatcher")
+        if added:
+            self.log(f"[dispatcher] 📥 {added} row masuk antrian (depth {self.queue.qsize()})")
+
+    def _finish(self, sheet_name, idx, imei):
+        with self.lock:
+            self.in_flight.discard((sheet_name, idx))
+            self.imei_owner.pop(imei, None)
+
+    # === Session ===
+    def _open_backend(self, source):
+        label = f"session-{source.name}"
+        if self.backend_kind == "http":
+            backend = self.worker.open_http_backend(label, source.email, source.password)
+            if backend is not None:
+                return backend, backend.close
+        backend = self.worker.open_selenium_backend(label, source.email, source.password)
+        if backend is None:
+            return None, None
+        return backend, lambda: self.worker.close_selenium_backend(backend, label)
+
+    def session_loop(self, source):
+        logger.bind(worker=f"session-{source.name}")
+        backend, close = self._open_backend(source)
+        if backend is None:
+            self.log(f"[dispatcher] ⚠️ Session {source.name} tidak jalan, row dikerjakan session lain", "WARNING")
+            return
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    sheet_name, idx, row = self.queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+                imei = str(row.get("IMEI", "")).strip()
+                try:
+                    target = self.sources[sheet_name]
+                    self.worker.run_row(backend, sheet_name, target.writer, idx, row)
+                finally:
+                    self._finish(sheet_name, idx, imei)
+                    self.queue.task_done()
+        finally:
+            close()
+
+    def run(self):
+        metrics.serve(own_name="dispatcher")
+        self.open_sources()
+        accounts = [s for s in self.sources.values() if s.email and s.password]
+        if self.backend_kind != "http":
+            capacity = browser_capacity()
+            if capacity is not None and capacity < len(accounts):
+                self.log(f"[dispatcher] 🧮 Memory host cukup untuk {capacity} browser, "
+                         f"{len(accounts) - capacity} session tidak dibuka", "WARNING")
+                accounts = accounts[:capacity]
+            self.worker.driver_pool.size = len(accounts)
+            self.worker.driver_pool.warm()
+        sessions = [
+            threading.Thread(target=self.session_loop, args=(source,), daemon=True, name=f"session-{source.name}")
+            for source in accounts
+        ]
+        for t in sessions:
+            t.start()
+        self.log(f"[dispatcher] 🚀 {len(sessions)} session untuk {len(self.sources)} sheet")
+        try:
+            while not self.stop_event.is_set():
+                self.collect()
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            self.stop_event.set()
+            for t in sessions:
+                t.join(timeout=60)
+            for source in self.sources.values():
+                source.writer.close()
+            self.log("[dispatcher] 🛑 Dispatcher berhenti")
+            metrics.write_summary("dispatcher")
+
+
+def main():
+    import worker
+    client = worker.get_gsheet_client(worker.JSON_CRED)
+    spreadsheet = client.open_by_url(worker.SHEET_URL)
+    configured = os.getenv("WORKER_SHEETS")
+    if configured:
+        names = [name.strip() for name in configured.split(",") if name.strip()]
+    else:
+        names = discover_worker_sheets(spreadsheet)
+    dispatcher = Dispatcher(spreadsheet, names, backend_kind=worker.SUBMIT_BACKEND)
+    install_shutdown_hooks(dispatcher.stop_event, (signal.SIGTERM, signal.SIGINT))
+    dispatcher.run()
+
+
+if __name__ == "__main__":
+    main()
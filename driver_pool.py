@@ -0,0 +1,398 @@
+# driver_pool.py
+# Pool browser Chrome: chromedriver di-resolve sekali (path di-cache di disk), browser dibuka paralel,
+# dicek kesehatannya, dan di-recycle kalau crash / sudah terlalu lama dipakai / RSS lewat budget.
+# Mode lean (LEAN_BROWSER, default aktif): flag hemat memory + blok gambar, font, media & tracker lewat CDP.
+# Footprint RSS per browser disimpan di disk, dipakai supervisor / dispatcher untuk hitung kapasitas host.
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+import location_index
+import logger
+import metrics
+import readiness
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER_CACHE_FILE = os.path.join(SCRIPT_DIR, ".driver_cache.json")
+FOOTPRINT_FILE = os.path.join(SCRIPT_DIR, ".browser_footprint.json")
+MB = 1024 * 1024
+
+# Flag hemat memory: cache disk kecil, proses renderer dibatasi, service background Chrome dimatikan
+LEAN_ARGS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-notifications",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-hang-monitor",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--renderer-process-limit=1",
+    "--disk-cache-size=1048576",
+    "--media-cache-size=1048576",
+    "--js-flags=--max-old-space-size=256",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,BackForwardCache,InterestFeedContentSuggestions",
+]
+
+# Pola URL yang diblok (Network.setBlockedURLs). CSS & JS Knack tidak diblok, form butuh keduanya.
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*intercom.io*", "*intercomcdn.com*", "*segment.io*", "*segment.com*",
+    "*mixpanel.com*", "*fullstory.com*", "*sentry.io*", "*clarity.ms*", "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            path = json.load(f).get("path")
+    except (OSError, ValueError):
+        return None
+    if path and os.path.isfile(path) and os.access(path, os.X_OK):
+        return path
+    return None
+
+
+def resolve_chromedriver(cache_file=None):
+    # Urutan: CHROMEDRIVER_PATH → cache di memory → cache di disk → ChromeDriverManager (sekali saja)
+    global _driver_path
+    env_path = os.getenv("CHROMEDRIVER_PATH")
+    if env_path:
+        return env_path
+    cache_file = cache_file or os.getenv("DRIVER_CACHE_FILE") or DRIVER_CACHE_FILE
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+        path = _read_cache(cache_file)
+        if not path:
+            # Import di sini biar start worker tidak bayar import webdriver_manager kalau cache ada
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            try:
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump({"path": path}, f)
+            except OSError as e:
+                logger.log(f"[driver] ⚠️ Gagal simpan cache chromedriver: {e}", "WARNING")
+            logger.log(f"[driver] 📦 chromedriver di-resolve: {path}")
+        _driver_path = path
+        return path
+
+
+def lean_enabled():
+    return os.getenv("LEAN_BROWSER", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def blocked_urls():
+    # BLOCK_URLS="*.css,*cdn.example.com*" menambah pola yang diblok
+    extra = [p.strip() for p in (os.getenv("BLOCK_URLS") or "").split(",") if p.strip()]
+    return BLOCKED_URLS + extra
+
+
+def build_options(headless=True, profile_dir=None, lean=None):
+    lean = lean_enabled() if lean is None else lean
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    if lean:
+        for arg in LEAN_ARGS:
+            chrome_options.add_argument(arg)
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    return chrome_options
+
+
+def block_requests(driver):
+    # Request yang cocok pola langsung digagalkan Chrome, tidak sempat download / decode
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls()})
+    except Exception as e:
+        logger.log(f"[driver] ⚠️ Blok request via CDP gagal: {type(e).__name__} - {e}", "WARNING")
+
+
+def setup_driver(headless=True, profile_dir=None, lean=None):
+    lean = lean_enabled() if lean is None else lean
+    driver = webdriver.Chrome(
+        service=Service(resolve_chromedriver()),
+        options=build_options(headless, profile_dir, lean),
+    )
+    readiness.install_network_hook(driver)
+    if lean:
+        block_requests(driver)
+    return driver
+
+
+def _children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def browser_rss(driver):
+    # Total RSS chromedriver + semua proses Chrome di bawahnya (Linux /proc), 0 kalau tidak bisa diukur
+    try:
+        root = driver.service.process.pid
+    except AttributeError:
+        return 0
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += _rss_bytes(pid)
+        stack.extend(_children(pid))
+    return total
+
+
+# === Footprint & kapasitas host ===
+def read_footprint(path=None):
+    # Rata-rata RSS per browser (byte) dari run sebelumnya, None kalau belum pernah diukur
+    try:
+        with open(path or os.getenv("FOOTPRINT_FILE") or FOOTPRINT_FILE, encoding="utf-8") as f:
+            value = json.load(f).get("rss_bytes")
+    except (OSError, ValueError):
+        return None
+    return float(value) if value else None
+
+
+def record_footprint(rss, path=None):
+    # Moving average, ditulis atomik; tulisan proses lain yang kebetulan bareng boleh hilang
+    path = path or os.getenv("FOOTPRINT_FILE") or FOOTPRINT_FILE
+    previous = read_footprint(path)
+    value = rss if previous is None else previous * 0.8 + rss * 0.2
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"rss_bytes": int(value), "updated_at": time.time()}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.log(f"[driver] ⚠️ Gagal simpan footprint browser: {e}", "WARNING")
+    return value
+
+
+def _mem_available():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def browser_capacity(running=0):
+    # Jumlah browser yang muat di host: yang sudah jalan + (memory bebas - cadangan) / footprint.
+    # None kalau memory host tidak bisa dibaca (non-Linux) → tidak dibatasi
+    available = _mem_available()
+    if available is None:
+        return None
+    reserve = float(os.getenv("HOST_RESERVE_MB") or 1024) * MB
+    footprint = read_footprint() or float(os.getenv("BROWSER_FOOTPRINT_MB") or 400) * MB
+    # Headroom 25%: RSS browser naik-turun selama submit
+    extra = math.floor(max(0.0, available - reserve) / (footprint * 1.25))
+    return max(1, running + extra)
+
+
+def is_healthy(driver):
+    try:
+        driver.execute_script("return 1")
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+
+class DriverPool:
+    def __init__(self, size, headless=True, max_rows=None, rss_budget_mb=None, rss_check_every=None):
+        self.size = size
+        self.headless = headless
+        # Recycle browser setelah N row, jaga-jaga memory leak di long run (0 = tidak pernah)
+        self.max_rows = int(max_rows if max_rows is not None else os.getenv("DRIVER_MAX_ROWS") or 0)
+        # Recycle browser kalau RSS (chromedriver + semua proses Chrome) lewat budget (0 = tidak dicek)
+        budget = rss_budget_mb if rss_budget_mb is not None else os.getenv("DRIVER_RSS_BUDGET_MB")
+        self.rss_budget = float(budget or 0) * MB
+        self.rss_check_every = int(rss_check_every or os.getenv("DRIVER_RSS_CHECK_EVERY") or 10)
+        self.cond = threading.Condition()
+        self.idle = []
+        self.busy = set()
+        self.launching = 0
+        self.profiles = {}  # id(driver) → profile dir
+        self.rows = {}  # id(driver) → jumlah row sejak dibuka
+        self.closed = False
+
+    def _launch(self):
+        profile_dir = tempfile.mkdtemp(prefix="profile_pool_")
+        try:
+            driver = setup_driver(self.headless, profile_dir)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self.profiles[id(driver)] = profile_dir
+        self.rows[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self.rows.pop(id(driver), None)
+        location_index.forget(driver)
+        profile_dir = self.profiles.pop(id(driver), None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    def _launch_slot(self):
+        # Dipanggil setelah self.launching dinaikkan di dalam lock
+        try:
+            return self._launch()
+        finally:
+            with self.cond:
+                self.launching -= 1
+                self.cond.notify_all()
+
+    def warm(self, count=None):
+        # Buka beberapa browser paralel di background, return langsung
+        with self.cond:
+            count = min(count or self.size, self.size - len(self.idle) - len(self.busy) - self.launching)
+            if count <= 0:
+                return
+            self.launching += count
+
+        def launch_into_idle():
+            driver = None
+            try:
+                driver = self._launch()
+            except Exception as e:
+                logger.log(f"[driver] ❌ Chrome gagal dibuka saat warm-up: {type(e).__name__} - {e}", "ERROR")
+            with self.cond:
+                # launching turun & idle naik dalam satu lock, biar acquire tidak buka browser ekstra
+                self.launching -= 1
+                if driver is not None:
+                    self.idle.append(driver)
+                self.cond.notify_all()
+
+        executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="driver-warm")
+        for _ in range(count):
+            executor.submit(launch_into_idle)
+        executor.shutdown(wait=False)
+
+    def acquire(self, timeout=None):
+        while True:
+            driver = None
+            with self.cond:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("DriverPool sudah ditutup")
+                    if self.idle:
+                        # Langsung dihitung busy, dicek sehatnya di luar lock (round-trip WebDriver)
+                        driver = self.idle.pop()
+                        self.busy.add(driver)
+                        break
+                    if len(self.busy) + self.launching < self.size:
+                        self.launching += 1
+                        break
+                    if not self.cond.wait(timeout):
+                        raise TimeoutError("Tidak ada browser yang bebas di pool")
+            if driver is None:
+                driver = self._launch_slot()
+                with self.cond:
+                    self.busy.add(driver)
+                return driver
+            if is_healthy(driver):
+                return driver
+            self.discard(driver)
+
+    def release(self, driver):
+        with self.cond:
+            self.busy.discard(driver)
+            if self.closed:
+                self._quit(driver)
+            else:
+                self.idle.append(driver)
+            self.cond.notify_all()
+
+    def discard(self, driver):
+        with self.cond:
+            self.busy.discard(driver)
+            self.cond.notify_all()
+        self._quit(driver)
+
+    def note_row(self, driver):
+        # Return alasan recycle kalau browser ini sudah waktunya diganti, None kalau belum
+        count = self.rows.get(id(driver), 0) + 1
+        self.rows[id(driver)] = count
+        if self.max_rows and count >= self.max_rows:
+            return "batas row per browser tercapai"
+        if count % self.rss_check_every == 0:
+            rss = browser_rss(driver)
+            if rss:
+                metrics.browser_rss(rss)
+                record_footprint(rss)
+                if self.rss_budget and rss > self.rss_budget:
+                    return f"RSS {rss / MB:.0f} MB melewati budget {self.rss_budget / MB:.0f} MB"
+        return None
+
+    def recycle(self, driver):
+        self.discard(driver)
+        return self.acquire()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            drivers = self.idle + list(self.busy)
+            self.idle = []
+            self.busy.clear()
+            self.cond.notify_all()
+        for driver in drivers:
+            self._quit(driver)
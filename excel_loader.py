@@ -1,15 +1,99 @@
-from openpyxl import load_workbook
-
-def load_rows_with_index(path):
-    wb = load_workbook(path)
-    ws = wb.active
-    rows = []
-    for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        imei, status, location = row[:3]
-        rows.append({
-            "IMEI": imei,
-            "Status": status,
-            "Location": location,
-            "row_index": i
-        })
-    return wb, ws, rows
+# excel_loader.py
+# Baca file inventory (.xlsx / .csv) secara streaming: row di-yield satu per satu, workbook dibuka read-only.
+# Hasil submit ditulis ke file sidecar CSV (<file>.results.csv) lewat SheetWriteBuffer, jadi bisa di-resume.
+
+import csv
+import os
+import threading
+
+from gspread.utils import a1_to_rowcol
+from openpyxl import load_workbook
+
+COLUMNS = ["IMEI", "Status", "Location"]
+SIDECAR_HEADER = ["Row", "IMEI", "Logs", "TimeStamp"]
+
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # IMEI yang kebaca angka (mis. 3.5e+14) → digit utuh
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_xlsx(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def iter_rows(path):
+    # Yield (row_index, row dict) mulai row 2; row index sama dengan nomor baris di file
+    ext = os.path.splitext(path)[1].lower()
+    raw = _iter_csv(path) if ext == ".csv" else _iter_xlsx(path)
+    header = [cell_text(v) for v in next(raw, None) or []]
+    if "IMEI" in header:
+        positions = {name: header.index(name) for name in header if name}
+    else:
+        # File lama tanpa header yang jelas: kolom A-C = IMEI, Status, Location
+        positions = {name: i for i, name in enumerate(COLUMNS)}
+
+    for idx, values in enumerate(raw, start=2):
+        row = {name: cell_text(values[i]) if i < len(values) else "" for name, i in positions.items()}
+        if not any(row.values()):
+            continue
+        yield idx, row
+
+
+def sidecar_path(path):
+    return f"{path}.results.csv"
+
+
+def load_results(path):
+    # Row → (Logs, IMEI) terakhir di sidecar, dipakai buat skip row yang sudah sukses saat resume
+    results = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                try:
+                    results[int(record["Row"])] = (record.get("Logs") or "", record.get("IMEI") or "")
+                except (KeyError, TypeError, ValueError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return results
+
+
+class ResultSidecar:
+    # Tampil seperti worksheet buat SheetWriteBuffer (title + batch_update), isinya di-append ke CSV
+    def __init__(self, path):
+        self.path = path
+        self.title = os.path.basename(path)
+        self.imeis = {}  # row idx → IMEI, diisi sebelum row disubmit (tetap disimpan buat hasil retry)
+        self.lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(SIDECAR_HEADER)
+
+    def note_row(self, idx, imei):
+        with self.lock:
+            self.imeis[idx] = imei
+
+    def batch_update(self, updates):
+        # Update dari SheetWriteBuffer: range "A<row>:B<row>" berisi [[log_msg, timestamp]]
+        records = []
+        with self.lock:
+            for update in updates:
+                idx, _ = a1_to_rowcol(update["range"].split(":")[0])
+                log_msg, timestamp = (update["values"][0] + ["", ""])[:2]
+                records.append([idx, self.imeis.get(idx, ""), log_msg, timestamp])
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(records)
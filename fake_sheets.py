@@ -0,0 +1,180 @@
+# fake_sheets.py
+# Fake gspread in-memory (client / spreadsheet / worksheet) untuk benchmark & test offline.
+# Cuma method yang dipakai worker yang diimplementasi; tiap call dihitung di FakeClient.calls.
+
+import threading
+import time
+from collections import Counter
+
+import gspread
+from gspread.utils import a1_range_to_grid_range
+
+from validation import luhn_check_digit
+
+
+class FakeClient:
+    def __init__(self, latency=0.0):
+        # latency (detik) per API call, buat meniru round-trip Google
+        self.latency = latency
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.spreadsheets = {}
+
+    def _call(self, name):
+        with self.lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create_spreadsheet(self, url="fake://sheet"):
+        spreadsheet = FakeSpreadsheet(self)
+        self.spreadsheets[url] = spreadsheet
+        return spreadsheet
+
+    def open_by_url(self, url):
+        self._call("open_by_url")
+        return self.spreadsheets[url]
+
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+
+class FakeSpreadsheet:
+    def __init__(self, client):
+        self.client = client
+        self.sheets = {}
+
+    def add_worksheet(self, title, rows=1000, cols=20, data=None):
+        self.client._call("add_worksheet")
+        ws = FakeWorksheet(self.client, title, data or [])
+        self.sheets[title] = ws
+        return ws
+
+    def worksheet(self, title):
+        self.client._call("worksheet")
+        if title not in self.sheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def worksheets(self):
+        self.client._call("worksheets")
+        return list(self.sheets.values())
+
+    def values_batch_get(self, ranges):
+        self.client._call("values_batch_get")
+        value_ranges = []
+        for a1 in ranges:
+            title, cells = a1.rsplit("!", 1)
+            values = self.sheets[title.strip("'")]._read(cells)
+            value_ranges.append({"range": a1, "values": values})
+        return {"valueRanges": value_ranges}
+
+
+class FakeWorksheet:
+    def __init__(self, client, title, data):
+        self.client = client
+        self.title = title
+        self.data = [list(map(str, row)) for row in data]
+        self.lock = threading.Lock()
+
+    # === Helper internal (tidak dihitung sebagai API call) ===
+    def _ensure(self, row, col):
+        while len(self.data) < row:
+            self.data.append([])
+        cells = self.data[row - 1]
+        while len(cells) < col:
+            cells.append("")
+
+    def _set(self, row, col, value):
+        self._ensure(row, col)
+        self.data[row - 1][col - 1] = "" if value is None else str(value)
+
+    def _read(self, a1):
+        grid = a1_range_to_grid_range(a1)
+        with self.lock:
+            r0 = grid.get("startRowIndex", 0)
+            r1 = grid.get("endRowIndex", len(self.data))
+            c0 = grid.get("startColumnIndex", 0)
+            c1 = grid.get("endColumnIndex", max((len(r) for r in self.data), default=0))
+            out = [(row + [""] * c1)[c0:c1] for row in self.data[r0:r1]]
+        # Sama seperti API asli: cell kosong di ujung row & row kosong di ujung range dibuang
+        trimmed = []
+        for row in out:
+            while row and row[-1] == "":
+                row = row[:-1]
+            trimmed.append(row)
+        while trimmed and not trimmed[-1]:
+            trimmed.pop()
+        return trimmed
+
+    # === API gspread ===
+    def row_values(self, row):
+        self.client._call("row_values")
+        with self.lock:
+            values = list(self.data[row - 1]) if len(self.data) >= row else []
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def cell(self, row, col):
+        self.client._call("cell")
+        values = self._read(gspread.utils.rowcol_to_a1(row, col))
+        return gspread.cell.Cell(row, col, values[0][0] if values and values[0] else None)
+
+    def update_cell(self, row, col, value):
+        self.client._call("update_cell")
+        with self.lock:
+            self._set(row, col, value)
+
+    def get(self, a1):
+        self.client._call("get")
+        return self._read(a1)
+
+    def batch_get(self, ranges):
+        self.client._call("batch_get")
+        return [self._read(a1) for a1 in ranges]
+
+    def get_all_values(self):
+        self.client._call("get_all_values")
+        with self.lock:
+            return [list(row) for row in self.data]
+
+    def get_all_records(self):
+        self.client._call("get_all_records")
+        with self.lock:
+            if not self.data:
+                return []
+            headers = self.data[0]
+            return [dict(zip(headers, row + [""] * (len(headers) - len(row)))) for row in self.data[1:]]
+
+    def _write_range(self, a1, values):
+        grid = a1_range_to_grid_range(a1)
+        with self.lock:
+            for i, row in enumerate(values):
+                for j, value in enumerate(row):
+                    self._set(grid.get("startRowIndex", 0) + 1 + i, grid.get("startColumnIndex", 0) + 1 + j, value)
+
+    def update(self, a1, values):
+        self.client._call("update")
+        self._write_range(a1, values)
+
+    def batch_update(self, updates):
+        self.client._call("batch_update")
+        for update in updates:
+            self._write_range(update["range"], update["values"])
+
+
+def make_worker_spreadsheet(client, workers, rows_per_sheet, location="JAVAMIFI-BSD", status="READY",
+                            imei_start=35000000000000, url="fake://sheet"):
+    # Sheet Worker-N dengan header + akun di I1/K1 + row IMEI unik (14 digit + check digit Luhn)
+    spreadsheet = client.create_spreadsheet(url)
+    imei = imei_start
+    for n in range(1, workers + 1):
+        header = ["IMEI", "Status", "Location", "", "", "", "", "", f"worker{n}@example.com", "", "secret"]
+        data = [header]
+        for _ in range(rows_per_sheet):
+            data.append([f"{imei}{luhn_check_digit(imei)}", status, location])
+            imei += 1
+        spreadsheet.sheets[f"Worker-{n}"] = FakeWorksheet(client, f"Worker-{n}", data)
+    return spreadsheet
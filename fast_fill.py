@@ -0,0 +1,188 @@
+# fast_fill.py
+# Isi form view_1726 (Location, Status, IMEI) + Submit dalam satu execute_async_script.
+# Semua tunggu (opsi chosen, autocomplete IMEI, AJAX submit) terjadi di dalam page, jadi cuma 1 round-trip WebDriver.
+# Hasilnya dict: ok, step terakhir, error, submitted (tombol Submit sudah diklik), timings per step (ms).
+# window.__fastFillSubmitted di-set sebelum klik Submit, jadi tetap bisa dicek kalau execute_async_script putus.
+
+import readiness
+
+FAST_FILL_JS = readiness.NETWORK_HOOK_JS + """
+var location = arguments[0], status = arguments[1], imei = arguments[2];
+var budgetMs = arguments[3], idleMs = arguments[4];
+var done = arguments[arguments.length - 1];
+var started = Date.now(), stepStarted = started;
+var result = {ok: false, step: 'location', error: null, submitted: false, timings: {}};
+var ended = false;
+window.__fastFillSubmitted = false;
+window.__fastFillAbort = false;
+
+function norm(s) { return String(s || '').replace(/\\s+/g, ' ').trim().toLowerCase(); }
+function visible(el) {
+  if (!el) return false;
+  var s = getComputedStyle(el);
+  if (s.visibility === 'hidden' || s.display === 'none') return false;
+  var r = el.getBoundingClientRect();
+  return r.width > 0 && r.height > 0;
+}
+function fire(el, types) {
+  types.forEach(function (type) {
+    var evt = type.indexOf('key') === 0
+      ? new KeyboardEvent(type, {bubbles: true, key: imei.slice(-1)})
+      : new MouseEvent(type, {bubbles: true, cancelable: true, view: window});
+    el.dispatchEvent(evt);
+  });
+}
+function change(el) {
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+  if (window.jQuery) window.jQuery(el).trigger('liszt:updated').trigger('chosen:updated');
+}
+function pending() {
+  var n = window.__knPending || 0;
+  if (window.jQuery && window.jQuery.active) n += window.jQuery.active;
+  return n;
+}
+function step(name) {
+  var now = Date.now();
+  result.timings[result.step] = now - stepStarted;
+  result.step = name;
+  stepStarted = now;
+}
+function finish(ok, error) {
+  if (ended) return;
+  ended = true;
+  result.timings[result.step] = Date.now() - stepStarted;
+  result.ok = ok;
+  result.error = error || null;
+  done(result);
+}
+// Error di callback (MutationObserver / setInterval) tidak ketangkap try luar, jadi dibungkus di sini
+function run(next, arg) {
+  try {
+    next(arg);
+  } catch (e) {
+    finish(false, e.name + ' - ' + e.message);
+  }
+}
+// Tunggu check() truthy tanpa round-trip: cek tiap mutasi DOM + poll 50ms, batas sisa budget
+function waitFor(check, next, what) {
+  var hit = check();
+  if (hit) return next(hit);
+  var finished = false;
+  var obs = new MutationObserver(tick);
+  var poll = setInterval(tick, 50);
+  var timer = setTimeout(function () { stop(); finish(false, 'Timeout tunggu ' + what); },
+                         Math.max(0, budgetMs - (Date.now() - started)));
+  function stop() { finished = true; obs.disconnect(); clearInterval(poll); clearTimeout(timer); }
+  function tick() {
+    if (finished) return;
+    if (ended || window.__fastFillAbort) return stop();
+    var h;
+    try {
+      h = check();
+    } catch (e) {
+      stop();
+      return finish(false, e.name + ' - ' + e.message);
+    }
+    if (h) { stop(); run(next, h); }
+  }
+  obs.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+function byId(id) { return document.getElementById(id); }
+
+try {
+  // Pesan error dari row sebelumnya jangan kebaca sebagai hasil row ini
+  document.querySelectorAll('.kn-message.is-error').forEach(function (m) { m.style.display = 'none'; });
+
+  waitFor(function () {
+    var container = byId('view_1726_field_932_chzn');
+    if (!container) return null;
+    var items = container.querySelectorAll('.chzn-results li');
+    for (var i = 0; i < items.length; i++) {
+      if (norm(items[i].textContent) === norm(location)) return items[i];
+    }
+    return null;
+  }, function (li) {
+    var container = byId('view_1726_field_932_chzn');
+    fire(container.querySelector('.chzn-single'), ['mousedown', 'mouseup', 'click']);
+    fire(li, ['mouseover', 'mousedown', 'mouseup', 'click']);
+    var select = byId('view_1726-field_932');
+    var picked = select && select.selectedIndex >= 0 ? select.options[select.selectedIndex].text : '';
+    if (norm(picked) !== norm(location)) return finish(false, 'Location tidak terpilih: ' + location);
+    fillStatus();
+  }, 'opsi Location ' + location);
+
+  function fillStatus() {
+    step('status');
+    var select = byId('view_1726-field_961');
+    if (!select) return finish(false, 'Dropdown Status tidak ditemukan');
+    select.value = status;
+    if (select.value !== status) return finish(false, 'Status tidak ada di dropdown: ' + status);
+    change(select);
+    fillImei();
+  }
+
+  function fillImei() {
+    step('imei_input');
+    var container = byId('view_1726_field_1037_chzn');
+    var input = container && container.querySelector('input.ui-autocomplete-input');
+    if (!input) return finish(false, 'Input IMEI tidak ditemukan');
+    fire(input, ['mousedown', 'mouseup', 'click']);
+    input.focus();
+    input.value = imei;
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    fire(input, ['keydown', 'keyup']);
+
+    step('imei_suggestion');
+    waitFor(function () {
+      var li = byId('view_1726_field_1037_chzn_o_0');
+      return visible(li) && li.textContent.indexOf(imei) !== -1 ? li : null;
+    }, function (li) {
+      fire(li, ['mouseover', 'mousedown', 'mouseup', 'click']);
+      var select = byId('view_1726-field_1037');
+      if (!select || !select.value) return finish(false, 'Suggestion IMEI tidak terpilih');
+      submit();
+    }, 'suggestion IMEI ' + imei);
+  }
+
+  function submit() {
+    step('submit');
+    var button = Array.prototype.filter.call(document.querySelectorAll('button'), function (b) {
+      return b.textContent.indexOf('Submit') !== -1;
+    })[0];
+    if (!button) return finish(false, 'Tombol Submit tidak ditemukan');
+    // Python sudah menyerah (abort) → jangan klik, row dilanjut step-by-step
+    if (window.__fastFillAbort) return finish(false, 'Fast-fill dibatalkan');
+    result.submitted = window.__fastFillSubmitted = true;
+    button.click();
+
+    step('after_submit');
+    // Sukses kalau AJAX sudah idle idleMs dan tidak ada pesan error Knack yang muncul
+    var quietSince = null;
+    waitFor(function () {
+      var error = Array.prototype.filter.call(document.querySelectorAll('.kn-message.is-error'), visible)[0];
+      if (error) return {error: error.innerText.trim() || 'Error'};
+      var now = Date.now();
+      if (pending()) quietSince = null;
+      else if (quietSince === null) quietSince = now;
+      return quietSince !== null && now - quietSince >= idleMs ? {error: null} : null;
+    }, function (outcome) {
+      if (outcome.error) return finish(false, 'Knack menolak submit: ' + outcome.error);
+      finish(true);
+    }, 'respon submit');
+  }
+} catch (e) {
+  finish(false, e.name + ' - ' + e.message);
+}
+"""
+
+
+def fill(driver, location, status, imei, budget=None, idle_ms=None):
+    budget = readiness.ready_timeout() if budget is None else budget
+    idle_ms = readiness.network_idle_ms() if idle_ms is None else idle_ms
+    return driver.execute_async_script(FAST_FILL_JS, location, status, imei, int(budget * 1000), idle_ms)
+
+
+def abort(driver):
+    # Dipanggil setelah fill() error: hentikan script yang mungkin masih jalan di page (JS single thread, jadi
+    # atomic terhadap klik Submit). Return True/False tombol Submit sudah diklik, None kalau page sudah ganti
+    return driver.execute_script("window.__fastFillAbort = true; return window.__fastFillSubmitted;")
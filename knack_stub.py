@@ -0,0 +1,364 @@
+# knack_stub.py
+# Stand-in lokal untuk Knack: API session/connections/records + replika form view_1726.
+# Dipakai buat test & benchmark offline, jalankan: python knack_stub.py --port 8765
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from helper import KNOWN_LOCATIONS
+
+STUB_APP_ID = "stub-app"
+# Latency buatan per jenis request (detik), buat benchmark yang mendekati Knack asli
+LATENCY_KEYS = ("page", "login", "locations", "search", "submit")
+
+
+def default_locations(total=30):
+    # Opsi diselang-seling dengan filler, urutannya sengaja tidak sama dengan Knack asli
+    fillers = [f"LOKASI-{i}" for i in range(max(0, total - len(KNOWN_LOCATIONS)))]
+    locations = []
+    for i, name in enumerate(KNOWN_LOCATIONS):
+        locations.extend(fillers[i * 2:i * 2 + 2])
+        locations.append(name)
+    locations.extend(fillers[len(KNOWN_LOCATIONS) * 2:])
+    return locations
+
+
+class KnackStubState:
+    def __init__(self, locations=None, imeis=None, accounts=None, latency=None):
+        self.lock = threading.Lock()
+        self.latency = {key: 0.0 for key in LATENCY_KEYS}
+        self.latency.update(latency or {})
+        self.locations = [{"id": f"loc{i}", "identifier": name}
+                          for i, name in enumerate(locations or default_locations())]
+        # imeis=None → semua IMEI numerik dianggap ada di Knack
+        self.imeis = set(imeis) if imeis is not None else None
+        self.accounts = accounts  # None → semua akun boleh login
+        self.tokens = set()
+        self.records = []
+
+    def delay(self, key):
+        seconds = self.latency.get(key) or 0
+        if seconds:
+            time.sleep(seconds)
+
+    def login(self, email, password):
+        if self.accounts is not None and self.accounts.get(email) != password:
+            return None
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens.add(token)
+        return token
+
+    def rental_options(self, search):
+        search = (search or "").strip()
+        if not search or not search.isdigit():
+            return []
+        if self.imeis is not None and search not in self.imeis:
+            return []
+        return [{"id": f"rent{search}", "identifier": search}]
+
+    def add_record(self, payload):
+        loc_ids = {loc["id"] for loc in self.locations}
+        location = payload.get("field_932") or []
+        rental = payload.get("field_1037") or []
+        if not location or location[0] not in loc_ids:
+            return None, "field_932 wajib diisi"
+        if payload.get("field_961") not in ("READY", "BROKEN"):
+            return None, "field_961 tidak valid"
+        if not rental:
+            return None, "field_1037 wajib diisi"
+        record = {"id": uuid.uuid4().hex, **payload}
+        with self.lock:
+            self.records.append(record)
+        return record, None
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                return json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return None
+
+        def _authorized(self):
+            return self.headers.get("Authorization") in state.tokens
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            if parsed.path in ("/", "/form"):
+                state.delay("page")
+                return self._send(200, FORM_HTML.encode("utf-8"), "text/html; charset=utf-8")
+            match = re.fullmatch(r"/v1/scenes/[^/]+/views/[^/]+/connections/(field_\d+)", parsed.path)
+            if match:
+                if not self._authorized():
+                    return self._send(401, {"errors": ["Unauthorized"]})
+                if match.group(1) == "field_932":
+                    state.delay("locations")
+                    return self._send(200, {"records": state.locations})
+                search = query.get("search", [""])[0]
+                state.delay("search")
+                return self._send(200, {"records": state.rental_options(search)})
+            self._send(404, {"errors": ["Not found"]})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            body = self._json_body()
+            if body is None:
+                return self._send(400, {"errors": ["Invalid JSON"]})
+            if re.fullmatch(r"/v1/applications/[^/]+/session", path):
+                state.delay("login")
+                token = state.login(body.get("email"), body.get("password"))
+                if not token:
+                    return self._send(401, {"errors": [{"message": "Email or password incorrect."}]})
+                return self._send(200, {"session": {"user": {"token": token, "email": body.get("email")}}})
+            if re.fullmatch(r"/v1/pages/[^/]+/views/[^/]+/records", path):
+                if not self._authorized():
+                    return self._send(401, {"errors": ["Unauthorized"]})
+                state.delay("submit")
+                record, error = state.add_record(body)
+                if error:
+                    return self._send(400, {"errors": [{"message": error}]})
+                return self._send(200, {"record": record})
+            self._send(404, {"errors": ["Not found"]})
+
+    return Handler
+
+
+def serve(state=None, host="127.0.0.1", port=0):
+    # Return (server, state); server jalan di background thread
+    state = state or KnackStubState()
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+FORM_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Knack Stub - Stock In</title>
+<style>
+.chzn-drop { display: none; border: 1px solid #aaa; }
+.chzn-with-drop .chzn-drop { display: block; }
+.active-result { padding: 2px 6px; cursor: pointer; }
+.kn-message { margin: 8px 0; }
+</style></head>
+<body>
+<div id="kn-app">
+  <div id="login">
+    <input type="email" placeholder="Email">
+    <input type="password" placeholder="Password">
+    <button type="button" id="login-btn">Sign In</button>
+    <div class="kn-message is-error" style="display:none"></div>
+  </div>
+</div>
+<template id="form-view">
+<div id="view_1726" class="kn-view kn-form">
+  <form>
+    <div class="kn-input">
+      <label>Location</label>
+      <select id="view_1726-field_932" name="field_932" style="display:none"></select>
+      <div id="view_1726_field_932_chzn" class="chzn-container chzn-container-single">
+        <a href="#" class="chzn-single"><span>Select</span></a>
+        <div class="chzn-drop"><ul class="chzn-results"></ul></div>
+      </div>
+    </div>
+    <div class="kn-input">
+      <label>Status</label>
+      <select id="view_1726-field_961" name="field_961">
+        <option value="">Select</option>
+        <option value="READY">READY</option>
+        <option value="BROKEN">BROKEN</option>
+      </select>
+    </div>
+    <div class="kn-input">
+      <label>Rental</label>
+      <select id="view_1726-field_1037" name="field_1037" style="display:none"></select>
+      <div id="view_1726_field_1037_chzn" class="chzn-container chzn-container-multi">
+        <ul class="chzn-choices"><li class="search-field">
+          <input type="text" value="Select" class="ui-autocomplete-input default" autocomplete="off">
+        </li></ul>
+        <div class="chzn-drop"><ul class="chzn-results"></ul></div>
+      </div>
+    </div>
+    <div class="kn-submit"><button type="submit" class="kn-button">Submit</button></div>
+    <div class="kn-message" style="display:none"></div>
+  </form>
+</div>
+</template>
+<script>
+(function () {
+  var API = "/v1";
+  var APP = "%(app_id)s";
+  var token = null;
+
+  function api(method, path, body) {
+    var headers = {"Content-Type": "application/json", "X-Knack-Application-Id": APP};
+    if (token) headers["Authorization"] = token;
+    return fetch(API + path, {method: method, headers: headers,
+                              body: body ? JSON.stringify(body) : undefined})
+      .then(function (r) { return r.json().then(function (j) { return {status: r.status, json: j}; }); });
+  }
+
+  document.getElementById("login-btn").addEventListener("click", function () {
+    var email = document.querySelector('#login input[type="email"]').value;
+    var password = document.querySelector('#login input[type="password"]').value;
+    api("POST", "/applications/" + APP + "/session", {email: email, password: password}).then(function (res) {
+      if (res.status !== 200) {
+        var msg = document.querySelector("#login .kn-message");
+        msg.textContent = "Email or password incorrect.";
+        msg.style.display = "block";
+        return;
+      }
+      token = res.json.session.user.token;
+      renderForm();
+    });
+  });
+
+  function renderForm() {
+    var app = document.getElementById("kn-app");
+    app.innerHTML = document.getElementById("form-view").innerHTML;
+    api("GET", "/scenes/scene_1/views/view_1726/connections/field_932").then(function (res) {
+      initLocation(res.json.records);
+    });
+    initRental();
+    initSubmit();
+  }
+
+  function initLocation(records) {
+    var container = document.getElementById("view_1726_field_932_chzn");
+    var select = document.getElementById("view_1726-field_932");
+    var list = container.querySelector(".chzn-results");
+    records.forEach(function (rec, i) {
+      select.add(new Option(rec.identifier, rec.id));
+      var li = document.createElement("li");
+      li.id = "view_1726_field_932_chzn_o_" + i;
+      li.className = "active-result";
+      li.textContent = rec.identifier;
+      li.addEventListener("click", function () {
+        if (!container.classList.contains("chzn-with-drop")) return;
+        select.value = rec.id;
+        container.querySelector(".chzn-single span").textContent = rec.identifier;
+        container.classList.remove("chzn-with-drop");
+        select.dispatchEvent(new Event("change", {bubbles: true}));
+      });
+      list.appendChild(li);
+    });
+    container.querySelector(".chzn-single").addEventListener("click", function (e) {
+      e.preventDefault();
+      container.classList.toggle("chzn-with-drop");
+    });
+  }
+
+  function initRental() {
+    var container = document.getElementById("view_1726_field_1037_chzn");
+    var select = document.getElementById("view_1726-field_1037");
+    var input = container.querySelector("input");
+    var list = container.querySelector(".chzn-results");
+    var timer = null;
+    input.addEventListener("focus", function () {
+      if (input.classList.contains("default")) { input.value = ""; input.classList.remove("default"); }
+    });
+    input.addEventListener("click", function () { input.focus(); });
+    function search() {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        var q = input.value.trim();
+        list.innerHTML = "";
+        if (!q) { container.classList.remove("chzn-with-drop"); return; }
+        api("GET", "/scenes/scene_1/views/view_1726/connections/field_1037?search=" + encodeURIComponent(q))
+          .then(function (res) {
+            list.innerHTML = "";
+            res.json.records.forEach(function (rec, i) {
+              var li = document.createElement("li");
+              li.id = "view_1726_field_1037_chzn_o_" + i;
+              li.className = "active-result";
+              li.textContent = rec.identifier;
+              li.addEventListener("click", function () {
+                select.innerHTML = "";
+                select.add(new Option(rec.identifier, rec.id, true, true));
+                input.value = rec.identifier;
+                container.classList.remove("chzn-with-drop");
+              });
+              list.appendChild(li);
+            });
+            container.classList.toggle("chzn-with-drop", res.json.records.length > 0);
+          });
+      }, 100);
+    }
+    input.addEventListener("input", search);
+    input.addEventListener("keyup", search);
+  }
+
+  function initSubmit() {
+    var form = document.querySelector("#view_1726 form");
+    form.addEventListener("submit", function (e) {
+      e.preventDefault();
+      var loc = document.getElementById("view_1726-field_932").value;
+      var rental = document.getElementById("view_1726-field_1037").value;
+      var payload = {
+        field_932: loc ? [loc] : [],
+        field_961: document.getElementById("view_1726-field_961").value,
+        field_1037: rental ? [rental] : []
+      };
+      api("POST", "/pages/scene_1/views/view_1726/records", payload).then(function (res) {
+        if (res.status === 200) renderForm();
+        var msg = document.querySelector("#view_1726 .kn-message");
+        msg.style.display = "block";
+        if (res.status === 200) {
+          msg.className = "kn-message success";
+          msg.textContent = "Form submitted.";
+        } else {
+          msg.className = "kn-message is-error";
+          msg.textContent = res.json.errors[0].message || "Error";
+        }
+      });
+    });
+  }
+})();
+</script>
+</body></html>
+""" % {"app_id": STUB_APP_ID}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knack stand-in lokal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for key in LATENCY_KEYS:
+        parser.add_argument(f"--latency-{key}", type=float, default=0.0, help=f"Delay request {key} (ms)")
+    args = parser.parse_args()
+    latency = {key: getattr(args, f"latency_{key}") / 1000 for key in LATENCY_KEYS}
+    server, _ = serve(KnackStubState(latency=latency), host=args.host, port=args.port)
+    print(f"[knack_stub] 🚀 Jalan di {base_url(server)} (FORM_URL={base_url(server)}/, "
+          f"KNACK_API_URL={base_url(server)}/v1, KNACK_APP_ID={STUB_APP_ID})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -7,4 +7,4 @@ source /www/wwwroot/Worker_Rental_Stock_In/worker_env/bin/activate
 cd /www/wwwroot/Worker_Rental_Stock_In
 
 # Jalanin script dan log output
-python3 worker.py >> logs/worker.log 2>&1
+python3 supervisor.py >> logs/worker.log 2>&1
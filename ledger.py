@@ -0,0 +1,136 @@
+# ledger.py
+# Ledger submit lokal (SQLite, mode WAL): status tiap (IMEI, sheet, row) = in_flight / submitted / failed.
+# Dicatat sebelum & sesudah submit, jadi kalau worker crash di antara klik Submit dan tulis sheet,
+# row tidak disubmit ulang saat restart. Setelah ✅ masuk sheet (written), ledger tidak menahan row itu lagi:
+# unit rental yang sama boleh stock-in ulang. Dedup antar row cuma untuk kerjaan yang masih "hidup"
+# (in_flight / sukses dalam LEDGER_DEDUP_WINDOW detik terakhir).
+
+import os
+import sqlite3
+import threading
+import time
+
+IN_FLIGHT = "in_flight"
+SUBMITTED = "submitted"
+FAILED = "failed"
+
+DEDUP_WINDOW = float(os.getenv("LEDGER_DEDUP_WINDOW") or 3600)
+DUPLICATE_PREFIX = "⛔ Duplikat IMEI"
+UNCERTAIN_MSG = "⛔ Submit tidak pasti (tidak ada konfirmasi dari Knack), cek di Knack lalu kosongkan Logs untuk submit ulang"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    imei TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    written INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (imei, sheet, row)
+);
+CREATE INDEX IF NOT EXISTS submissions_state ON submissions (imei, state);
+"""
+
+
+class Ledger:
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        # Satu koneksi per proses, dipakai bareng antar thread (dijaga self.lock); antar proses diurus WAL
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(SCHEMA)
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(submissions)")}
+        if "written" not in columns:
+            # Ledger lama: hasil submit dianggap sudah masuk sheet
+            self.conn.execute("ALTER TABLE submissions ADD COLUMN written INTEGER NOT NULL DEFAULT 1")
+
+    def _set(self, imei, sheet, row, state, message="", attempt=0):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO submissions (imei, sheet, row, state, message, attempts, written, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?) "
+                "ON CONFLICT (imei, sheet, row) DO UPDATE SET state = excluded.state, "
+                "message = excluded.message, attempts = attempts + excluded.attempts, written = 0, "
+                "updated_at = excluded.updated_at",
+                (imei, sheet, row, state, message, attempt, time.time()),
+            )
+
+    def begin(self, imei, sheet, row):
+        self._set(imei, sheet, row, IN_FLIGHT, attempt=1)
+
+    def finish(self, imei, sheet, row, ok, message):
+        self._set(imei, sheet, row, SUBMITTED if ok else FAILED, message)
+
+    def flag_uncertain(self, imei, sheet, row):
+        self._set(imei, sheet, row, IN_FLIGHT, UNCERTAIN_MSG)
+
+    def mark_written(self, sheet, rows):
+        # Dipanggil SheetWriteBuffer setelah batch_update sukses: rows = {row idx: [log_msg, timestamp]}
+        done = [(sheet, idx) for idx, (log_msg, _) in rows.items() if log_msg.startswith("✅")]
+        if not done:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE submissions SET written = 1 WHERE sheet = ? AND row = ? AND state = 'submitted'", done)
+
+    def get(self, imei, sheet, row):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT state, message, written FROM submissions WHERE imei = ? AND sheet = ? AND row = ?",
+                (imei, sheet, row),
+            ).fetchone()
+
+    def live_owner(self, imei, sheet, row, window=None):
+        # Row lain yang sedang / baru saja (dalam window) submit IMEI ini: (sheet, row, state), None kalau tidak ada
+        since = time.time() - (DEDUP_WINDOW if window is None else window)
+        with self.lock:
+            return self.conn.execute(
+                "SELECT sheet, row, state FROM submissions WHERE imei = ? AND state IN (?, ?) "
+                "AND message != ? AND updated_at >= ? AND NOT (sheet = ? AND row = ?) "
+                "ORDER BY updated_at LIMIT 1",
+                (imei, IN_FLIGHT, SUBMITTED, UNCERTAIN_MSG, since, sheet, row),
+            ).fetchone()
+
+    def resolve(self, imei, sheet, row, logs=""):
+        # Return log_msg kalau row ini TIDAK boleh disubmit (hasil belum tertulis / duplikat / tidak pasti),
+        # None kalau boleh
+        record = self.get(imei, sheet, row)
+        if record and record[0] == SUBMITTED and not record[2]:
+            # Crash setelah submit, sebelum ✅ masuk sheet → tulis ulang hasilnya, jangan submit lagi
+            return record[1] or "✅ Submit sukses"
+        # Duplikat yang Logs-nya sudah dikosongkan operator → memang mau stock-in lagi
+        cleared = record and record[1].startswith(DUPLICATE_PREFIX) and not logs
+        owner = None if cleared else self.live_owner(imei, sheet, row)
+        if owner:
+            verb = "sedang disubmit" if owner[2] == IN_FLIGHT else "baru saja disubmit"
+            message = f"{DUPLICATE_PREFIX}, {verb} dari {owner[0]} row {owner[1] - 1} (kosongkan Logs untuk submit ulang)"
+            self._set(imei, sheet, row, FAILED, message)
+            return message
+        if record and record[0] == IN_FLIGHT:
+            # Sisa crash: Submit mungkin sudah masuk Knack. Boleh ulang kalau operator sudah kosongkan Logs
+            if record[1] == UNCERTAIN_MSG and not logs:
+                return None
+            if record[1] != UNCERTAIN_MSG:
+                self.flag_uncertain(imei, sheet, row)
+            return UNCERTAIN_MSG
+        return None
+
+    def counts(self, sheet=None):
+        query = "SELECT state, COUNT(*) FROM submissions"
+        params = ()
+        if sheet:
+            query += " WHERE sheet = ?"
+            params = (sheet,)
+        with self.lock:
+            return dict(self.conn.execute(query + " GROUP BY state", params).fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
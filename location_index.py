@@ -0,0 +1,88 @@
+# location_index.py
+# Index opsi Location (teks → id option chosen) yang di-scrape langsung dari form, sekali per session browser.
+# Kalau lookup miss / option hilang, index dibangun ulang otomatis (Knack bisa mengubah urutan opsi).
+
+import re
+import threading
+
+import logger
+
+LOCATION_FIELD_ID = "view_1726_field_932"
+
+SCRAPE_OPTIONS_JS = """
+var fieldId = arguments[0];
+var out = [];
+var container = document.getElementById(fieldId + '_chzn');
+if (container) {
+  container.querySelectorAll('.chzn-results li').forEach(function (li) {
+    if (li.id) out.push([li.textContent.trim(), li.id]);
+  });
+}
+if (!out.length) {
+  // Chosen belum build list → hitung id dari urutan option di <select> asli
+  var select = document.getElementById(fieldId.replace('_field_', '-field_'));
+  if (select) {
+    Array.prototype.forEach.call(select.options, function (opt, i) {
+      if (opt.value) out.push([opt.text.trim(), fieldId + '_chzn_o_' + i]);
+    });
+  }
+}
+return out;
+"""
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", str(text)).strip().casefold()
+
+
+class LocationIndex:
+    def __init__(self, field_id=LOCATION_FIELD_ID):
+        self.field_id = field_id
+        self.options = {}  # teks ternormalisasi → id <li> chosen
+        self.labels = []  # teks opsi apa adanya, buat validasi row
+        self.builds = 0
+
+    def build(self, driver):
+        pairs = driver.execute_script(SCRAPE_OPTIONS_JS, self.field_id) or []
+        self.options = {normalize(text): option_id for text, option_id in pairs}
+        self.labels = [text for text, _ in pairs]
+        self.builds += 1
+        logger.debug(f"[location] 🗂️ Index location dibangun: {len(self.options)} opsi (build ke-{self.builds})",
+                     step="location")
+
+    def invalidate(self):
+        self.options = {}
+
+    def option_id(self, driver, location):
+        key = normalize(location)
+        if not self.options:
+            self.build(driver)
+        option_id = self.options.get(key)
+        if option_id is None:
+            # Miss → mungkin opsi Knack berubah, scrape ulang sekali
+            self.build(driver)
+            option_id = self.options.get(key)
+        if option_id is None:
+            raise ValueError(f"❌ Location '{location}' tidak ada di dropdown Knack.")
+        return option_id
+
+    def option_xpath(self, driver, location):
+        return f'//*[@id="{self.option_id(driver, location)}"]'
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(driver):
+    # Satu index per browser; browser baru (recycle) otomatis dapat index baru
+    with _indexes_lock:
+        index = _indexes.get(id(driver))
+        if index is None:
+            index = _indexes[id(driver)] = LocationIndex()
+        return index
+
+
+def forget(driver):
+    with _indexes_lock:
+        _indexes.pop(id(driver), None)
@@ -0,0 +1,169 @@
+# logger.py
+# Logger non-blocking: producer cuma enqueue record, satu writer thread yang nulis file (batch + rotasi).
+# Konfigurasi env: LOG_LEVEL (DEBUG/INFO/WARNING/ERROR), LOG_FORMAT (text/json),
+# LOG_MAX_BYTES, LOG_BACKUPS, LOG_CONSOLE (1/0), LOG_FILE (nama file di LOG_DIR).
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+FIELDS = ("worker", "sheet", "row", "imei", "step", "duration")
+
+_context = threading.local()
+
+
+def _level_no(name):
+    return LEVELS.get(str(name).upper(), 20)
+
+
+class LogWriter:
+    def __init__(self, log_dir, filename=None, fmt=None, level=None, max_bytes=None,
+                 backups=None, console=None, batch_size=200, flush_interval=0.5):
+        self.path = os.path.join(log_dir, filename or os.getenv("LOG_FILE") or "log.txt")
+        self.fmt = (fmt or os.getenv("LOG_FORMAT") or "text").lower()
+        self.level = _level_no(level or os.getenv("LOG_LEVEL") or "INFO")
+        self.max_bytes = int(max_bytes or os.getenv("LOG_MAX_BYTES") or 10 * 1024 * 1024)
+        self.backups = int(backups or os.getenv("LOG_BACKUPS") or 5)
+        if console is None:
+            console = (os.getenv("LOG_CONSOLE") or "1") == "1"
+        self.console = console
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.file = None
+        self.stopped = threading.Event()
+        os.makedirs(log_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def enabled(self, level):
+        return _level_no(level) >= self.level
+
+    def put(self, record):
+        self.queue.put(record)
+
+    def _format(self, record):
+        if self.fmt == "json":
+            return json.dumps(record, ensure_ascii=False)
+        extra = " ".join(f"{k}={record[k]}" for k in FIELDS if k in record)
+        line = f"[{record['ts']}] {record['msg']}"
+        if record["level"] != "INFO":
+            line = f"[{record['ts']}] {record['level']} {record['msg']}"
+        return f"{line} | {extra}" if extra else line
+
+    def _open(self):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        return self.file
+
+    def _rotate(self):
+        self.file.close()
+        self.file = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write_batch(self, records):
+        lines = [self._format(r) for r in records]
+        if self.console:
+            print("\n".join(lines), flush=True)
+        f = self._open()
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        if f.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self.stopped.is_set():
+                    return
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except OSError as e:
+                print(f"[logger] ❌ Gagal tulis log: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def close(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.stopped.set()
+        self.thread.join(timeout=self.flush_interval * 2)
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def setup(log_dir, **kwargs):
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter(log_dir, **kwargs)
+            atexit.register(_writer.close)
+        return _writer
+
+
+def current_context():
+    return dict(getattr(_context, "fields", {}))
+
+
+def bind(**fields):
+    # Context permanen untuk thread ini (mis. worker/sheet)
+    ctx = current_context()
+    ctx.update({k: v for k, v in fields.items() if v is not None})
+    _context.fields = ctx
+
+
+@contextmanager
+def context(**fields):
+    # Context sementara (mis. row/imei selama satu row diproses)
+    previous = current_context()
+    bind(**fields)
+    try:
+        yield
+    finally:
+        _context.fields = previous
+
+
+def log(msg, level="INFO", **fields):
+    writer = _writer
+    if writer is None:
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+        return
+    if not writer.enabled(level):
+        return
+    record = {"ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "level": str(level).upper(), "msg": msg}
+    record.update(current_context())
+    record.update({k: v for k, v in fields.items() if v is not None})
+    writer.put(record)
+
+
+def debug(msg, **fields):
+    log(msg, level="DEBUG", **fields)
@@ -1,3 +1,143 @@
-from worker import submit_inventory
-
-submit_inventory(r"C:\Users\brinm\OneDrive\JavaMifi Logistics\inventory.xlsx")  # Excel path bisa dipakai nanti
+# main_submit.py
+# Submit bulk dari file inventory (.xlsx / .csv) tanpa lewat Google Sheets.
+# Row dibaca streaming, disubmit lewat backend yang sama dengan worker, hasil ditulis batch ke <file>.results.csv.
+# Contoh:
+#   KNACK_EMAIL=... KNACK_PASSWORD=... python main_submit.py inventory.xlsx
+#   python main_submit.py inventory.csv --backend http --email a@b.com --password ...
+# Jalankan ulang dengan file yang sama untuk lanjut: row yang sudah ✅ di sidecar dengan IMEI yang sama di-skip.
+
+import argparse
+import os
+import signal
+import threading
+from itertools import islice
+
+import logger
+import metrics
+from excel_loader import ResultSidecar, iter_rows, load_results, sidecar_path
+from sheet_writer import install_shutdown_hooks
+
+BATCH_ROWS = 500
+
+
+def open_backend(worker, backend_kind, label, email, password):
+    if backend_kind == "http":
+        backend = worker.open_http_backend(label, email, password)
+        if backend is not None:
+            return backend, backend.close
+    backend = worker.open_selenium_backend(label, email, password)
+    if backend is None:
+        return None, None
+    return backend, lambda: worker.close_selenium_backend(backend, label)
+
+
+def is_retrying(log_msg):
+    # "❌ Error: ... (retry n/m dalam Xs)" dari RetryScheduler; ⛔ = permanen / jatah retry habis
+    return log_msg.startswith("❌ Error")
+
+
+def retry_pending(worker, backend, label, writer, retrying, counts, stop_event):
+    # File cuma dibaca sekali, jadi row transient ditunggu backoff-nya di sini sampai sukses / diparkir
+    if retrying:
+        worker.log(f"[{label}] 🔁 {len(retrying)} row gagal sementara, dicoba ulang setelah backoff")
+    while retrying and not stop_event.is_set():
+        due = [(idx, row) for idx, row in sorted(retrying.items()) if worker.retries.due(label, idx, row)]
+        if not due:
+            stop_event.wait(1)
+            continue
+        for idx, row in due:
+            if stop_event.is_set():
+                break
+            log_msg = worker.run_row(backend, label, writer, idx, row)
+            if not is_retrying(log_msg):
+                del retrying[idx]
+                counts["ok" if log_msg.startswith("✅") else "error"] += 1
+    # Dihentikan di tengah backoff: sisa row tetap "❌ Error", diambil lagi saat file dijalankan ulang
+    counts["error"] += len(retrying)
+
+
+def submit_file(worker, path, email, password, backend_kind=None, results_path=None, stop_event=None):
+    label = os.path.basename(path)
+    logger.bind(worker=f"file-{label}", sheet=label)
+    stop_event = stop_event or threading.Event()
+    results_path = results_path or sidecar_path(path)
+    # Row → IMEI yang sudah ✅; row yang IMEI-nya beda (file diganti) disubmit lagi
+    done = {idx: imei for idx, (msg, imei) in load_results(results_path).items() if msg.startswith("✅")}
+    if done:
+        worker.log(f"[{label}] ⏭️ {len(done)} row sudah sukses di {results_path}, di-skip")
+
+    backend, close = open_backend(worker, backend_kind or worker.SUBMIT_BACKEND, label, email, password)
+    if backend is None:
+        worker.log(f"[{label}] ❌ Login gagal, file tidak diproses", "ERROR")
+        return None
+
+    sidecar = ResultSidecar(results_path)
+    writer = worker.result_writer(sidecar, label, 1, 2, max_rows=200)
+    counts = {"ok": 0, "error": 0, "invalid": 0, "skipped": 0}
+    retrying = {}  # row idx → row yang gagal transient, dicoba lagi setelah pass utama
+    replaced = 0
+    rows = iter_rows(path)
+    try:
+        while not stop_event.is_set():
+            # Validasi per potongan BATCH_ROWS, file tetap dibaca streaming
+            chunk = list(islice(rows, BATCH_ROWS))
+            if not chunk:
+                break
+            batch = []
+            for idx, row in chunk:
+                if not row.get("IMEI") or row.get("Logs", "").startswith("✅"):
+                    counts["skipped"] += 1
+                    continue
+                if idx in done:
+                    if done[idx] == row["IMEI"]:
+                        counts["skipped"] += 1
+                        continue
+                    replaced += 1
+                sidecar.note_row(idx, row["IMEI"])
+                batch.append((idx, row))
+            accepted = worker.validate_rows(label, writer, batch)
+            counts["invalid"] += len(batch) - len(accepted)
+            for idx, row in accepted:
+                if stop_event.is_set():
+                    break
+                log_msg = worker.run_row(backend, label, writer, idx, row)
+                if is_retrying(log_msg):
+                    retrying[idx] = row
+                else:
+                    counts["ok" if log_msg.startswith("✅") else "error"] += 1
+        if replaced:
+            worker.log(f"[{label}] ⚠️ {replaced} row sudah ✅ di {results_path} tapi IMEI-nya beda, disubmit ulang",
+                       "WARNING")
+        retry_pending(worker, backend, label, writer, retrying, counts, stop_event)
+    finally:
+        writer.close()
+        close()
+    worker.log(f"[{label}] 📊 Selesai: {counts['ok']} sukses, {counts['error']} error, "
+               f"{counts['invalid']} tidak valid, {counts['skipped']} di-skip → {results_path}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit stock-in dari file .xlsx / .csv")
+    parser.add_argument("path", help="File inventory (.xlsx / .csv), kolom IMEI, Status, Location")
+    parser.add_argument("--email", default=os.getenv("KNACK_EMAIL"))
+    parser.add_argument("--password", default=os.getenv("KNACK_PASSWORD"))
+    parser.add_argument("--backend", choices=["http", "selenium"], help="Default: SUBMIT_BACKEND")
+    parser.add_argument("--results", help="File hasil (default: <file>.results.csv)")
+    args = parser.parse_args()
+    if not args.email or not args.password:
+        parser.error("Akun Knack wajib diisi (--email/--password atau KNACK_EMAIL/KNACK_PASSWORD)")
+
+    import worker
+    stop_event = threading.Event()
+    # Row yang sedang jalan diselesaikan, sisanya bisa dilanjut di run berikutnya
+    install_shutdown_hooks(stop_event, (signal.SIGTERM, signal.SIGINT))
+    metrics.serve(own_name="main_submit")
+    try:
+        submit_file(worker, args.path, args.email, args.password, args.backend, args.results, stop_event)
+    finally:
+        metrics.write_summary("main_submit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# metrics.py
+# Metrics per worker: histogram latency per step, counter row / gagal per step / call Sheets API, gauge antrian.
+# Tiap proses simpan snapshot JSON ke METRICS_DIR; proses yang pegang METRICS_PORT (supervisor / dispatcher)
+# menggabungkan semuanya di endpoint Prometheus http://127.0.0.1:<port>/metrics dan /summary (JSON).
+# Ringkasan JSON juga ditulis ke METRICS_SUMMARY saat shutdown.
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logger
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_DIR = os.getenv("METRICS_DIR") or os.path.join(SCRIPT_DIR, "logs_worker", "metrics")
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS = {
+    "stockin_step_seconds": ("histogram", "Durasi per step submit (login, location, status, imei, submit, sheets)"),
+    "stockin_step_failures_total": ("counter", "Jumlah gagal per step"),
+    "stockin_rows_total": ("counter", "Row diproses per hasil (ok, error, parked, invalid, ledger)"),
+    "stockin_queue_depth": ("gauge", "Row yang menunggu diproses"),
+    "stockin_sheets_calls_total": ("counter", "Call Google Sheets API per method"),
+    "stockin_sheets_seconds": ("histogram", "Durasi call Google Sheets API per method"),
+    "stockin_browser_rss_bytes": ("gauge", "RSS browser terakhir diukur (chromedriver + proses Chrome)"),
+    "stockin_ready_wait_seconds": ("histogram", "Waktu tunggu sinyal DOM / AJAX per step (pengganti sleep fix)"),
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.values = {}  # (name, labels) → angka (counter/gauge) atau [bucket counts..., sum, count]
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            key = (name, _key(labels))
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, labels, value):
+        with self.lock:
+            self.values[(name, _key(labels))] = value
+
+    def observe(self, name, labels, seconds):
+        with self.lock:
+            key = (name, _key(labels))
+            hist = self.values.get(key)
+            if hist is None:
+                hist = self.values[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    def snapshot(self, name=None):
+        with self.lock:
+            series = [[metric, dict(labels), value if not isinstance(value, list) else list(value)]
+                      for (metric, labels), value in self.values.items()]
+        return {"name": name, "pid": os.getpid(), "started_at": self.started_at,
+                "updated_at": time.time(), "series": series}
+
+
+registry = Registry()
+
+
+def worker_label():
+    return str(logger.current_context().get("worker") or "main")
+
+
+# === Instrumentasi ===
+def observe_step(step, seconds, worker=None):
+    registry.observe("stockin_step_seconds", {"worker": worker or worker_label(), "step": step}, seconds)
+
+
+def step_failed(step, worker=None):
+    registry.inc("stockin_step_failures_total", {"worker": worker or worker_label(), "step": step})
+
+
+def ready_wait(step, seconds, worker=None):
+    registry.observe("stockin_ready_wait_seconds", {"worker": worker or worker_label(), "step": step}, seconds)
+
+
+@contextmanager
+def step(name):
+    # Catat durasi step; exception di dalam blok dihitung sebagai gagal di step ini
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException:
+        step_failed(name)
+        raise
+    finally:
+        observe_step(name, time.monotonic() - started)
+
+
+def timed(name):
+    # Decorator: return False juga dihitung gagal (mis. login_knack)
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with step(name):
+                result = func(*args, **kwargs)
+            if result is False:
+                step_failed(name)
+            return result
+        return wrapper
+    return decorate
+
+
+def row_result(result, worker=None, count=1):
+    registry.inc("stockin_rows_total", {"worker": worker or worker_label(), "result": result}, count)
+
+
+def queue_depth(depth, worker=None):
+    registry.set("stockin_queue_depth", {"worker": worker or worker_label()}, depth)
+
+
+def browser_rss(rss, worker=None):
+    registry.set("stockin_browser_rss_bytes", {"worker": worker or worker_label()}, rss)
+
+
+@contextmanager
+def sheets_call(sheet, method):
+    labels = {"sheet": str(sheet), "method": method}
+    registry.inc("stockin_sheets_calls_total", labels)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        registry.observe("stockin_sheets_seconds", labels, time.monotonic() - started)
+
+
+# === Snapshot antar proses ===
+def _snapshot_path(name):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(METRICS_DIR, f"{safe}.json")
+
+
+def write_snapshot(name):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(name), f)
+    os.replace(tmp, path)
+
+
+def start_snapshots(name, interval=None):
+    # Dipanggil di proses worker: snapshot ditulis berkala + sekali lagi saat exit
+    interval = float(interval or os.getenv("METRICS_INTERVAL") or 15)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(name)
+            except OSError as e:
+                logger.log(f"[metrics] ⚠️ Gagal tulis snapshot: {e}", "WARNING")
+
+    threading.Thread(target=loop, daemon=True, name="metrics-snapshot").start()
+    atexit.register(write_snapshot, name)
+
+
+def collect(own_name="main"):
+    # Snapshot proses ini + snapshot proses lain di METRICS_DIR
+    snapshots = {own_name: registry.snapshot(own_name)}
+    try:
+        files = [f for f in os.listdir(METRICS_DIR) if f.endswith(".json") and f != "summary.json"]
+    except FileNotFoundError:
+        files = []
+    for filename in files:
+        try:
+            with open(os.path.join(METRICS_DIR, filename), encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snap.get("name") and snap.get("name") != own_name:
+            snapshots[snap["name"]] = snap
+    return list(snapshots.values())
+
+
+def _merge(snapshots):
+    merged = {}
+    for snap in snapshots:
+        for metric, labels, value in snap.get("series", []):
+            key = (metric, _key(labels))
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0] * len(value))
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, extra=None):
+    items = list(labels) + list(extra or [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def render(snapshots):
+    merged = _merge(snapshots)
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        series = sorted((labels, value) for (name, labels), value in merged.items() if name == metric)
+        if not series:
+            continue
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for labels, value in series:
+            if kind != "histogram":
+                lines.append(f"{metric}{_label_text(labels)} {value}")
+                continue
+            for bound, count in zip(BUCKETS, value):
+                lines.append(f"{metric}_bucket{_label_text(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{_label_text(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{metric}_sum{_label_text(labels)} {value[-2]:.6f}")
+            lines.append(f"{metric}_count{_label_text(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(hist, q):
+    # Estimasi dari bucket histogram (interpolasi linear), cukup buat cari hot spot
+    total = hist[-1]
+    if not total:
+        return 0.0
+    rank = q * total
+    lower, prev = 0.0, 0
+    for bound, count in zip(BUCKETS, hist):
+        if count >= rank:
+            width = count - prev
+            return lower + (bound - lower) * ((rank - prev) / width if width else 0)
+        lower, prev = bound, count
+    return BUCKETS[-1]
+
+
+def summary(snapshots):
+    from readiness import FIXED_SLEEP_BASELINE
+    workers = {}
+    for snap in snapshots:
+        name = snap.get("name") or "main"
+        uptime = max(1e-9, snap.get("updated_at", time.time()) - snap.get("started_at", time.time()))
+        info = workers.setdefault(name, {"uptime_s": round(uptime, 1), "rows": {}, "steps": {},
+                                         "failures": {}, "sheets_calls": {}, "queue_depth": {},
+                                         "browser_rss_mb": {}, "readiness": {}})
+        for metric, labels, value in snap.get("series", []):
+            if metric == "stockin_rows_total":
+                info["rows"][labels["result"]] = info["rows"].get(labels["result"], 0) + value
+            elif metric == "stockin_step_seconds":
+                info["steps"][f"{labels['worker']}/{labels['step']}"] = {
+                    "count": value[-1],
+                    "mean_ms": round(value[-2] / value[-1] * 1000, 1) if value[-1] else 0.0,
+                    "p50_ms": round(_quantile(value, 0.5) * 1000, 1),
+                    "p95_ms": round(_quantile(value, 0.95) * 1000, 1),
+                }
+            elif metric == "stockin_step_failures_total":
+                info["failures"][f"{labels['worker']}/{labels['step']}"] = value
+            elif metric == "stockin_sheets_calls_total":
+                info["sheets_calls"][f"{labels['sheet']}/{labels['method']}"] = value
+            elif metric == "stockin_queue_depth":
+                info["queue_depth"][labels["worker"]] = value
+            elif metric == "stockin_browser_rss_bytes":
+                info["browser_rss_mb"][labels["worker"]] = round(value / 1024 / 1024, 1)
+            elif metric == "stockin_ready_wait_seconds":
+                # Waktu tunggu beneran vs sleep fix lama → detik yang dihemat
+                baseline = FIXED_SLEEP_BASELINE.get(labels["step"], 0.0)
+                info["readiness"][f"{labels['worker']}/{labels['step']}"] = {
+                    "count": value[-1],
+                    "mean_ms": round(value[-2] / value[-1] * 1000, 1) if value[-1] else 0.0,
+                    "baseline_s": baseline,
+                    "saved_s": round(baseline * value[-1] - value[-2], 1),
+                }
+        done = sum(info["rows"].values())
+        info["rows_per_min"] = round(done / uptime * 60, 2)
+    return {"generated_at": time.strftime("%Y-%m-%d %H:%M:%S"), "workers": workers}
+
+
+def write_summary(own_name="main", path=None):
+    path = path or os.getenv("METRICS_SUMMARY") or os.path.join(METRICS_DIR, "summary.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary(collect(own_name)), f, indent=2)
+    logger.log(f"[metrics] 📊 Ringkasan metrics ditulis ke {path}")
+    return path
+
+
+# === Endpoint ===
+def serve(port=None, host=None, own_name="main"):
+    # Return server (jalan di background thread), None kalau METRICS_PORT tidak di-set
+    port = port if port is not None else os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    host = host or os.getenv("METRICS_HOST") or "127.0.0.1"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = render(collect(own_name)).encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/summary":
+                body = json.dumps(summary(collect(own_name)), indent=2).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    logger.log(f"[metrics] 📈 Endpoint metrics di http://{host}:{server.server_address[1]}/metrics")
+    return server
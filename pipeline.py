@@ -0,0 +1,165 @@
+# pipeline.py
+# Worker 3 tahap yang jalan bareng, dihubungkan queue berbatas:
+#   prefetch  → poll sheet + validasi, row pending masuk antrian (PIPELINE_DEPTH)
+#   submit    → browser / API ambil row dari antrian (thread pemanggil)
+#   write-back→ hasil dikumpulkan lalu batch_update ke sheet
+# Browser tidak pernah menunggu API Google; row yang masih antri / diproses / belum tertulis tidak diambil ulang.
+
+import os
+import queue
+import threading
+import time
+
+import logger
+import metrics
+import readiness
+
+
+class RowPipeline:
+    def __init__(self, reader, backend, sheet_name, writer, validate, run_row, stop_event=None,
+                 depth=None, poll_interval=10.0):
+        self.reader = reader
+        self.backend = backend
+        self.sheet_name = sheet_name
+        self.writer = writer
+        self.validate = validate
+        self.run_row = run_row
+        self.stop_event = stop_event or threading.Event()
+        self.poll_interval = poll_interval
+        self.rows = queue.Queue(maxsize=int(depth or os.getenv("PIPELINE_DEPTH") or 20))
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.claimed = set()  # row idx yang sedang antri / diproses / menunggu ditulis
+        self.unwritten = set()  # row idx yang hasilnya belum masuk sheet
+        self.submit_done = threading.Event()
+        self.halt = threading.Event()  # berhenti internal (error di tahap submit), stop_event milik pemanggil
+
+    def stopped(self):
+        return self.stop_event.is_set() or self.halt.is_set()
+
+    def _wait(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self.stopped() and time.monotonic() < deadline:
+            self.halt.wait(min(0.5, max(0.0, deadline - time.monotonic())))
+
+    # Dipakai run_row sebagai "writer": hasil cuma di-antri, tahap write-back yang kirim ke sheet
+    def add(self, row_idx, log_msg, timestamp):
+        with self.lock:
+            self.unwritten.add(row_idx)
+        self.results.put((row_idx, log_msg, timestamp))
+
+    def _claim(self, idx):
+        with self.lock:
+            if idx in self.claimed or self.writer.has_pending(idx):
+                return False
+            self.claimed.add(idx)
+            return True
+
+    def _release(self, idx):
+        with self.lock:
+            self.claimed.discard(idx)
+
+    def _thread(self, target, name):
+        context = logger.current_context()
+
+        def run():
+            logger.bind(**context)
+            target()
+
+        t = threading.Thread(target=run, daemon=True, name=f"{name}-{self.sheet_name}")
+        t.start()
+        return t
+
+    # === Tahap 1: prefetch ===
+    def _put(self, item):
+        while not self.stopped():
+            try:
+                self.rows.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def prefetch_loop(self):
+        while not self.stopped():
+            try:
+                rows = self.validate(self.sheet_name, self.writer, self.reader.poll())
+            except Exception as e:
+                logger.log(f"[{self.sheet_name}] ⚠️ Prefetch gagal: {type(e).__name__} - {e}", "WARNING")
+                rows = []
+            added = 0
+            for idx, row in rows:
+                if not self._claim(idx):
+                    continue
+                if not self._put((idx, row)):
+                    self._release(idx)
+                    break
+                added += 1
+                metrics.queue_depth(self.rows.qsize())
+            if added:
+                logger.debug(f"[{self.sheet_name}] 📥 {added} row masuk antrian (depth {self.rows.qsize()})")
+            self._wait(self.poll_interval)
+
+    # === Tahap 2: submit (browser / API) ===
+    def submit_loop(self):
+        try:
+            while not self.stopped():
+                try:
+                    idx, row = self.rows.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                metrics.queue_depth(self.rows.qsize())
+                self.run_row(self.backend, self.sheet_name, self, idx, row)
+        finally:
+            self.submit_done.set()
+            # Row yang masih antri saat drain dilepas, diambil lagi di run berikutnya
+            while True:
+                try:
+                    idx, _ = self.rows.get_nowait()
+                except queue.Empty:
+                    break
+                self._release(idx)
+            metrics.queue_depth(0)
+
+    # === Tahap 3: write-back ===
+    def _drain_results(self, timeout):
+        items = []
+        try:
+            items.append(self.results.get(timeout=timeout))
+            while True:
+                items.append(self.results.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _release_written(self):
+        # Claim baru dilepas setelah batch_update sukses, biar poll berikutnya tidak baca Logs lama
+        with self.lock:
+            written = {idx for idx in self.unwritten if not self.writer.has_pending(idx)}
+            self.unwritten -= written
+            self.claimed -= written
+
+    def writeback_loop(self):
+        # Flush diatur SheetWriteBuffer (max_rows / interval); di sini cuma dipaksa saat drain
+        while True:
+            finished = self.submit_done.is_set()
+            items = self._drain_results(timeout=0 if finished else 0.5)
+            for idx, log_msg, timestamp in items:
+                self.writer.add(idx, log_msg, timestamp)
+            if finished and self.results.empty():
+                self.writer.flush()
+                self._release_written()
+                return
+            self._release_written()
+
+    def run(self):
+        prefetch = self._thread(self.prefetch_loop, "prefetch")
+        writeback = self._thread(self.writeback_loop, "writeback")
+        try:
+            self.submit_loop()
+        finally:
+            self.halt.set()
+            writeback.join()
+            prefetch.join(timeout=30)
+            for line in readiness.stats.summary_lines():
+                logger.log(f"[{self.sheet_name}] ⏱️ {line}")
@@ -0,0 +1,191 @@
+# readiness.py
+# Tunggu sinyal DOM beneran (MutationObserver, AJAX idle, state chosen) sebagai ganti time.sleep fix.
+
+import os
+import threading
+import time
+
+import metrics
+
+# Sleep fix lama per step, buat hitung waktu yang dihemat
+FIXED_SLEEP_BASELINE = {
+    "after_login": 2.0,
+    "chosen_open": 0.5,
+    "chosen_retry": 1.0,
+    "imei_autocomplete": 1.0,
+    "chosen_close": 0.5,
+    "after_submit": 2.0,
+    # Step fast-fill (waktu di dalam page) vs sleep fix yang dulu ada di step yang sama
+    "fast_fill_location": 1.0,  # chosen_open + chosen_close
+    "fast_fill_imei_suggestion": 1.5,  # imei_autocomplete + chosen_close
+    "fast_fill_after_submit": 2.0,
+}
+
+NETWORK_HOOK_JS = """
+(function () {
+  if (window.__knPending !== undefined) return;
+  window.__knPending = 0;
+  function done() { window.__knPending = Math.max(0, window.__knPending - 1); }
+  var send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    window.__knPending++;
+    this.addEventListener('loadend', done);
+    return send.apply(this, arguments);
+  };
+  if (window.fetch) {
+    var origFetch = window.fetch;
+    window.fetch = function () {
+      window.__knPending++;
+      return origFetch.apply(this, arguments).finally(done);
+    };
+  }
+})();
+"""
+
+WAIT_CONDITION_JS = """
+var xpath = arguments[0], mode = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+function find() {
+  return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function visible(el) {
+  if (!el) return false;
+  var s = getComputedStyle(el);
+  if (s.visibility === 'hidden' || s.display === 'none') return false;
+  var r = el.getBoundingClientRect();
+  return r.width > 0 && r.height > 0 && r.right > 0 && r.bottom > 0;
+}
+function check() {
+  var el = find();
+  if (mode === 'visible') return visible(el) ? el : null;
+  if (mode === 'gone') return visible(el) ? null : true;
+  if (!el) return mode === 'chosen_closed' ? true : null;
+  var drop = el.querySelector('.chzn-drop');
+  var open = el.classList.contains('chzn-with-drop') ||
+             (el.classList.contains('chzn-container-active') && visible(drop));
+  return open === (mode === 'chosen_open') ? el : null;
+}
+var hit = check();
+if (hit) { done(hit); return; }
+var finished = false, obs, timer, poll;
+function finish(result) {
+  if (finished) return;
+  finished = true;
+  obs.disconnect(); clearTimeout(timer); clearInterval(poll);
+  done(result);
+}
+function recheck() { var h = check(); if (h) finish(h); }
+obs = new MutationObserver(recheck);
+obs.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+// Jaga-jaga perubahan visual tanpa mutasi DOM (transisi CSS), dicek di dalam page tanpa round-trip
+poll = setInterval(recheck, 250);
+timer = setTimeout(function () { finish(null); }, timeoutMs);
+"""
+
+NETWORK_IDLE_JS = NETWORK_HOOK_JS + """
+var idleMs = arguments[0], timeoutMs = arguments[1];
+var done = arguments[arguments.length - 1];
+function pending() {
+  var n = window.__knPending || 0;
+  if (window.jQuery && window.jQuery.active) n += window.jQuery.active;
+  return n;
+}
+var start = Date.now(), quietSince = null;
+(function tick() {
+  var now = Date.now();
+  if (pending()) quietSince = null;
+  else if (quietSince === null) quietSince = now;
+  if (quietSince !== null && now - quietSince >= idleMs) return done(true);
+  if (now - start >= timeoutMs) return done(false);
+  setTimeout(tick, 25);
+})();
+"""
+
+
+def ready_timeout():
+    return float(os.getenv("READY_TIMEOUT") or 15)
+
+
+def network_idle_timeout():
+    return float(os.getenv("NETWORK_IDLE_TIMEOUT") or 10)
+
+
+def network_idle_ms():
+    return int(os.getenv("NETWORK_IDLE_MS") or 300)
+
+
+class ReadinessStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = {}
+
+    def record(self, step, waited):
+        with self.lock:
+            count, total = self.steps.get(step, (0, 0.0))
+            self.steps[step] = (count + 1, total + waited)
+        # Ikut ke registry metrics biar masuk summary JSON (semua proses worker)
+        metrics.ready_wait(step, waited)
+
+    def summary_lines(self):
+        lines = []
+        with self.lock:
+            for step, (count, total) in sorted(self.steps.items()):
+                baseline = FIXED_SLEEP_BASELINE.get(step, 0.0)
+                saved = baseline * count - total
+                lines.append(
+                    f"{step}: {count}x, rata-rata tunggu {total / count:.3f}s "
+                    f"vs sleep {baseline:.1f}s → hemat {saved:.1f}s"
+                )
+        return lines
+
+
+stats = ReadinessStats()
+
+
+def record_fast_fill(timings):
+    # timings dari fast_fill.fill (ms per step)
+    for step, ms in timings.items():
+        key = f"fast_fill_{step}"
+        if key in FIXED_SLEEP_BASELINE:
+            stats.record(key, ms / 1000)
+
+
+def install_network_hook(driver):
+    # Pasang counter XHR/fetch sebelum script halaman jalan
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_HOOK_JS})
+    except Exception:
+        pass
+    driver.set_script_timeout(max(ready_timeout(), network_idle_timeout()) + 5)
+
+
+def wait_condition(driver, xpath, mode, timeout=None, step=None):
+    timeout = ready_timeout() if timeout is None else timeout
+    start = time.monotonic()
+    result = driver.execute_async_script(WAIT_CONDITION_JS, xpath, mode, int(timeout * 1000))
+    if step:
+        stats.record(step, time.monotonic() - start)
+    return result
+
+
+def wait_visible(driver, xpath, timeout=None, step=None):
+    return wait_condition(driver, xpath, "visible", timeout, step)
+
+
+def wait_chosen_open(driver, container_xpath, timeout=None, step="chosen_open"):
+    return wait_condition(driver, container_xpath, "chosen_open", timeout, step) is not None
+
+
+def wait_chosen_closed(driver, container_xpath, timeout=None, step="chosen_close"):
+    return wait_condition(driver, container_xpath, "chosen_closed", timeout, step) is not None
+
+
+def wait_network_idle(driver, timeout=None, idle_ms=None, step=None):
+    timeout = network_idle_timeout() if timeout is None else timeout
+    idle_ms = network_idle_ms() if idle_ms is None else idle_ms
+    start = time.monotonic()
+    # NETWORK_IDLE_JS ikut pasang hook kalau page belum punya
+    idle = driver.execute_async_script(NETWORK_IDLE_JS, idle_ms, int(timeout * 1000))
+    if step:
+        stats.record(step, time.monotonic() - start)
+    return bool(idle)
@@ -0,0 +1,134 @@
+# retry_policy.py
+# Row gagal diklasifikasi: transient (timeout, stale element, session/koneksi putus) → retry dengan
+# backoff eksponensial sampai RETRY_MAX_ATTEMPTS; permanent (location / status tidak dikenal, IMEI tidak
+# ada di Knack, ditolak Knack) → diparkir dengan Logs "⛔ ..." dan tidak diambil lagi sampai row diedit
+# (isi selain Logs/TimeStamp berubah, atau Logs dikosongkan).
+
+import hashlib
+import os
+import random
+import threading
+import time
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+PARKED_PREFIX = "⛔"
+
+# Nama class exception (Selenium / requests / builtin) yang biasanya hilang kalau dicoba lagi.
+# Subclass WebDriverException lain (InvalidSelectorException, dll) = bug selector / script → permanent
+TRANSIENT_ERRORS = {
+    "TimeoutError", "TimeoutException", "StaleElementReferenceException", "InvalidSessionIdException",
+    "NoSuchWindowException", "NoSuchElementException", "ElementClickInterceptedException",
+    "ElementNotInteractableException", "ElementNotVisibleException", "JavascriptException",
+    "UnexpectedAlertPresentException", "SessionNotCreatedException", "ConnectionError", "Timeout",
+    "ChunkedEncodingError", "SessionExpired",
+}
+# Potongan pesan error yang pasti gagal lagi kalau row-nya tidak diubah
+PERMANENT_PATTERNS = (
+    "tidak ditemukan di knack",
+    "tidak ada di dropdown knack",
+    "unknown status",
+    "gagal klik suggestion imei",
+    "knack menolak submit",
+    "http 400",
+    "http 403",
+    "http 404",
+    "http 422",
+)
+IGNORED_FIELDS = ("Logs", "TimeStamp")
+
+
+def classify(error):
+    if isinstance(error, (ValueError, KeyError)):
+        return PERMANENT
+    names = [cls.__name__ for cls in type(error).__mro__]
+    if any(name in TRANSIENT_ERRORS for name in names):
+        return TRANSIENT
+    if names[0] == "WebDriverException":
+        # WebDriverException polos = browser crash / disconnect, browser di-recycle lalu dicoba lagi
+        return TRANSIENT
+    if "WebDriverException" in names:
+        return PERMANENT
+    message = str(error).lower()
+    if any(pattern in message for pattern in PERMANENT_PATTERNS):
+        return PERMANENT
+    # Sisanya (termasuk error yang belum dikenal) dianggap transient, dibatasi jumlah percobaan
+    return TRANSIENT
+
+
+def fingerprint(row):
+    values = [f"{k}={row[k]}" for k in sorted(row) if k not in IGNORED_FIELDS]
+    return hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()
+
+
+class RetryState:
+    def __init__(self, digest):
+        self.digest = digest
+        self.attempts = 0
+        self.next_at = 0.0
+        self.parked = False
+        self.seen_parked = False  # Logs ⛔ sudah terbaca dari sheet (write-back sudah masuk)
+
+
+class RetryScheduler:
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        self.max_attempts = int(max_attempts or os.getenv("RETRY_MAX_ATTEMPTS") or 5)
+        self.base_delay = float(base_delay or os.getenv("RETRY_BASE_DELAY") or 30)
+        self.max_delay = float(max_delay or os.getenv("RETRY_MAX_DELAY") or 1800)
+        self.lock = threading.Lock()
+        self.states = {}  # (sheet, row idx) → RetryState
+
+    def _state(self, sheet, idx, row):
+        # Dipanggil di dalam lock. Row diedit → riwayat gagal dibuang
+        key = (sheet, idx)
+        digest = fingerprint(row)
+        state = self.states.get(key)
+        if state is None or state.digest != digest:
+            state = self.states[key] = RetryState(digest)
+        return state
+
+    def due(self, sheet, idx, row, now=None):
+        # False kalau row masih menunggu backoff / sedang diparkir
+        now = now or time.monotonic()
+        logs = str(row.get("Logs", ""))
+        with self.lock:
+            known = (sheet, idx) in self.states
+            state = self._state(sheet, idx, row)
+            if logs.startswith(PARKED_PREFIX):
+                if not known or state.parked:
+                    # Logs ⛔ dari run sebelumnya (state hilang saat restart) tetap diparkir sampai row diedit
+                    state.parked = state.seen_parked = True
+            elif state.parked and state.seen_parked:
+                # Operator mengosongkan / mengganti Logs → boleh dicoba lagi
+                state.parked = state.seen_parked = False
+                state.attempts = 0
+                state.next_at = 0.0
+            return not state.parked and now >= state.next_at
+
+    def is_retry(self, sheet, idx):
+        with self.lock:
+            state = self.states.get((sheet, idx))
+            return bool(state and state.attempts)
+
+    def succeeded(self, sheet, idx):
+        with self.lock:
+            self.states.pop((sheet, idx), None)
+
+    def failed(self, sheet, idx, row, error):
+        # Catat kegagalan, return log_msg untuk kolom Logs
+        reason = f"{type(error).__name__} - {error}"
+        kind = classify(error)
+        with self.lock:
+            state = self._state(sheet, idx, row)
+            state.attempts += 1
+            if kind == PERMANENT:
+                state.parked = True
+                return f"{PARKED_PREFIX} Gagal permanen: {reason} (edit row untuk coba lagi)"
+            if state.attempts >= self.max_attempts:
+                state.parked = True
+                return (f"{PARKED_PREFIX} Gagal {state.attempts}x: {reason} "
+                        f"(edit row / kosongkan Logs untuk coba lagi)")
+            delay = min(self.max_delay, self.base_delay * 2 ** (state.attempts - 1))
+            delay *= random.uniform(0.8, 1.2)
+            state.next_at = time.monotonic() + delay
+            return f"❌ Error: {reason} (retry {state.attempts}/{self.max_attempts - 1} dalam {delay:.0f}s)"
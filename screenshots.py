@@ -0,0 +1,147 @@
+# screenshots.py
+# Screenshot per worker: mode "off", "sampled", atau "on_failure" (default).
+# on_failure: frame disimpan di ring buffer memory, ditulis ke disk cuma kalau row gagal.
+# Penulisan file jalan di background thread, nama file unik per worker/row.
+
+import atexit
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import logger
+
+MODES = ("off", "sampled", "on_failure")
+
+_write_queue = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def _writer_loop():
+    while True:
+        path, png = _write_queue.get()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(png)
+        except OSError as e:
+            logger.log(f"[screenshots] ❌ Gagal tulis {path}: {e}", "ERROR")
+        finally:
+            _write_queue.task_done()
+
+
+def _ensure_writer():
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, daemon=True)
+            _writer_thread.start()
+            atexit.register(drain)
+
+
+def drain(timeout=10):
+    # Tunggu antrian file selesai ditulis (dipanggil saat shutdown)
+    deadline = time.monotonic() + timeout
+    while _write_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name)).strip("_")[:80] or "step"
+
+
+class ScreenshotRecorder:
+    def __init__(self, worker, base_dir, mode=None, sample_every=None, ring_size=None, ring_steps=None):
+        self.worker = _safe(worker)
+        self.base_dir = base_dir
+        self.mode = (mode or os.getenv("SCREENSHOT_MODE") or "on_failure").lower()
+        if self.mode not in MODES:
+            self.mode = "on_failure"
+        self.sample_every = int(sample_every or os.getenv("SCREENSHOT_SAMPLE_EVERY") or 50)
+        ring_size = int(ring_size or os.getenv("SCREENSHOT_RING_SIZE") or 5)
+        # Default ring cuma isi frame error; step sukses dicatat nama saja tanpa gambar
+        if ring_steps is None:
+            ring_steps = (os.getenv("SCREENSHOT_RING_STEPS") or "0") == "1"
+        self.ring_steps = ring_steps
+        self.ring = deque(maxlen=ring_size)
+        self.row_idx = None
+        self.rows_seen = 0
+        self.seq = 0
+
+    def _path(self, name):
+        self.seq += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        row = f"row{self.row_idx}" if self.row_idx is not None else "norow"
+        return os.path.join(self.base_dir, self.worker, f"{row}_{stamp}_{self.seq:03d}_{_safe(name)}.png")
+
+    def _persist(self, name, png):
+        _ensure_writer()
+        _write_queue.put((self._path(name), png))
+
+    def _sampled_row(self):
+        return self.mode == "sampled" and (self.rows_seen - 1) % self.sample_every == 0
+
+    def begin_row(self, row_idx):
+        self.row_idx = row_idx
+        self.rows_seen += 1
+        self.ring.clear()
+
+    def step(self, driver, name):
+        if self.mode == "off":
+            return
+        if self._sampled_row():
+            self._persist(name, driver.get_screenshot_as_png())
+            return
+        is_error = name.startswith(("error", "wait_visible_failed"))
+        png = driver.get_screenshot_as_png() if (is_error or self.ring_steps) else None
+        self.ring.append((name, png))
+
+    def row_failed(self, driver=None):
+        if self.mode == "off":
+            return
+        frames = list(self.ring)
+        self.ring.clear()
+        if driver is not None:
+            try:
+                frames.append(("final", driver.get_screenshot_as_png()))
+            except Exception:
+                pass
+        for name, png in frames:
+            if png:
+                self._persist(name, png)
+
+    def row_succeeded(self):
+        self.ring.clear()
+
+
+def attach(driver, worker, base_dir, **kwargs):
+    recorder = ScreenshotRecorder(worker, base_dir, **kwargs)
+    with _recorders_lock:
+        _recorders[id(driver)] = recorder
+    return recorder
+
+
+def rebind(old_driver, new_driver):
+    with _recorders_lock:
+        recorder = _recorders.pop(id(old_driver), None)
+        if recorder is not None:
+            _recorders[id(new_driver)] = recorder
+
+
+def detach(driver):
+    with _recorders_lock:
+        _recorders.pop(id(driver), None)
+
+
+def recorder_for(driver, base_dir):
+    with _recorders_lock:
+        recorder = _recorders.get(id(driver))
+        if recorder is None:
+            recorder = _recorders[id(driver)] = ScreenshotRecorder("main", base_dir)
+        return recorder
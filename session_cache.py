@@ -0,0 +1,110 @@
+# session_cache.py
+# Cache session Knack per akun (cookies + localStorage), dienkripsi Fernet di disk.
+# Key dari env SESSION_CACHE_KEY, atau dibuat sekali di <cache_dir>/.key (chmod 600).
+
+import hashlib
+import json
+import os
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken
+
+import logger
+
+DUMP_STORAGE_JS = """
+var out = {};
+for (var i = 0; i < window.localStorage.length; i++) {
+  var k = window.localStorage.key(i);
+  out[k] = window.localStorage.getItem(k);
+}
+return out;
+"""
+
+RESTORE_STORAGE_JS = """
+var items = arguments[0];
+Object.keys(items).forEach(function (k) { window.localStorage.setItem(k, items[k]); });
+"""
+
+
+class SessionCache:
+    def __init__(self, cache_dir, key=None, max_age=None):
+        self.cache_dir = cache_dir
+        # Umur maksimal cache (detik), lewat dari ini dianggap expired tanpa probe
+        self.max_age = int(max_age or os.getenv("SESSION_MAX_AGE") or 12 * 3600)
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.fernet = Fernet(key or os.getenv("SESSION_CACHE_KEY") or self._load_or_create_key())
+
+    def _load_or_create_key(self):
+        key_path = os.path.join(self.cache_dir, ".key")
+        try:
+            with open(key_path, "rb") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            key = Fernet.generate_key()
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+            return key
+
+    def _path(self, account):
+        digest = hashlib.sha256(account.strip().lower().encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}.session")
+
+    def save(self, account, driver):
+        try:
+            data = {
+                "url": driver.current_url,
+                "cookies": driver.get_cookies(),
+                "local_storage": driver.execute_script(DUMP_STORAGE_JS) or {},
+            }
+        except Exception as e:
+            logger.log(f"[session] ⚠️ Gagal ambil session browser: {type(e).__name__} - {e}", "WARNING")
+            return False
+        token = self.fernet.encrypt(json.dumps(data).encode("utf-8"))
+        path = self._path(account)
+        with self.lock:
+            tmp_path = f"{path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(tmp_path, path)
+        return True
+
+    def load(self, account):
+        try:
+            with open(self._path(account), "rb") as f:
+                token = f.read()
+            return json.loads(self.fernet.decrypt(token, ttl=self.max_age))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError):
+            # Expired / key ganti / file rusak → buang saja
+            self.invalidate(account)
+            return None
+
+    def restore(self, account, driver, url):
+        # Pasang cookies + localStorage ke browser, return False kalau tidak ada cache
+        data = self.load(account)
+        if not data:
+            return False
+        driver.get(url)
+        driver.delete_all_cookies()
+        for cookie in data.get("cookies", []):
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # Cookie domain lain (mis. api.knack.com) tidak bisa dipasang dari halaman ini
+                pass
+        try:
+            driver.execute_script(RESTORE_STORAGE_JS, data.get("local_storage", {}))
+        except Exception:
+            pass
+        driver.refresh()
+        return True
+
+    def invalidate(self, account):
+        try:
+            os.remove(self._path(account))
+        except FileNotFoundError:
+            pass
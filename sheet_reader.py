@@ -0,0 +1,138 @@
+# sheet_reader.py
+# Reader inkremental worker sheet: cursor + cache row yang belum selesai.
+# Poll cuma baca tail (row baru) + row yang belum ✅, bukan get_all_records tiap 10 detik.
+# Row yang sudah ✅ dicek lewat kolom IMEI + Logs saja (ikut batch_get yang sama): kalau sheet dikosongkan /
+# ditimpa batch baru, row itu dibaca ulang tanpa menunggu full resync.
+
+import os
+
+from gspread.utils import rowcol_to_a1
+
+import metrics
+
+
+def is_done(row):
+    return str(row.get("Logs", "")).startswith("✅")
+
+
+class IncrementalSheetReader:
+    def __init__(self, sheet, headers, tail_rows=200, full_resync_every=None):
+        self.sheet = sheet
+        self.headers = list(headers)
+        self.tail_rows = tail_rows
+        # Tiap N poll baca full sekali, jaga-jaga kolom lain di row lama diedit
+        self.full_resync_every = int(full_resync_every or os.getenv("SHEET_FULL_RESYNC_EVERY") or 60)
+        self.cursor = 1  # row terakhir yang sudah pernah dibaca (row 1 = header)
+        self.rows = {}  # row idx → dict, cuma row yang belum selesai
+        self.done = {}  # row idx → IMEI row yang sudah ✅, buat deteksi row ditimpa / dihapus
+        self.polls = 0
+
+    def _col(self, index):
+        return rowcol_to_a1(1, index + 1).rstrip("1")
+
+    def _last_col(self):
+        return self._col(len(self.headers) - 1)
+
+    def _range(self, start, end):
+        return f"A{start}:{self._last_col()}{end}"
+
+    def _to_dict(self, values):
+        values = [str(v) for v in values] + [""] * (len(self.headers) - len(values))
+        return dict(zip(self.headers, values))
+
+    def _store(self, row_idx, values):
+        row = self._to_dict(values)
+        if is_done(row):
+            self.rows.pop(row_idx, None)
+            self.done[row_idx] = row.get("IMEI", "")
+        else:
+            self.rows[row_idx] = row
+            self.done.pop(row_idx, None)
+
+    def _full_read(self):
+        with metrics.sheets_call(self.sheet.title, "get_all_values"):
+            values = self.sheet.get_all_values()
+        if values:
+            self.headers = values[0]
+        self.rows.clear()
+        self.done.clear()
+        for row_idx, row_values in enumerate(values[1:], start=2):
+            self._store(row_idx, row_values)
+        self.cursor = max(1, len(values))
+
+    def _read_tail(self):
+        while True:
+            start = self.cursor + 1
+            with metrics.sheets_call(self.sheet.title, "get"):
+                chunk = self.sheet.get(self._range(start, start + self.tail_rows - 1))
+            for offset, row_values in enumerate(chunk):
+                self._store(start + offset, row_values)
+            if chunk:
+                self.cursor = start + len(chunk) - 1
+            if len(chunk) < self.tail_rows:
+                return
+
+    def _row_ranges(self, indices):
+        # Gabung row berurutan jadi satu range biar request-nya kecil
+        ranges = []
+        for row_idx in sorted(indices):
+            if ranges and ranges[-1][1] == row_idx - 1:
+                ranges[-1][1] = row_idx
+            else:
+                ranges.append([row_idx, row_idx])
+        return ranges
+
+    def _done_columns(self):
+        # Range kolom IMEI + Logs untuk semua row ✅, None kalau tidak bisa dicek
+        if not self.done or "IMEI" not in self.headers or "Logs" not in self.headers:
+            return None
+        end = max(self.done)
+        return [f"{self._col(self.headers.index(name))}2:{self._col(self.headers.index(name))}{end}"
+                for name in ("IMEI", "Logs")]
+
+    def _changed_done(self, imei_col, logs_col):
+        def cell(column, row_idx):
+            values = column[row_idx - 2] if row_idx - 2 < len(column) else []
+            return str(values[0]) if values else ""
+
+        return [row_idx for row_idx, imei in self.done.items()
+                if cell(imei_col, row_idx) != imei or not cell(logs_col, row_idx).startswith("✅")]
+
+    def _read_rows(self, ranges, extra=()):
+        with metrics.sheets_call(self.sheet.title, "batch_get"):
+            results = self.sheet.batch_get([self._range(start, end) for start, end in ranges] + list(extra))
+        for (start, end), chunk in zip(ranges, results):
+            for offset in range(end - start + 1):
+                self._store(start + offset, chunk[offset] if offset < len(chunk) else [])
+        return results[len(ranges):]
+
+    def _read_unfinished(self):
+        ranges = self._row_ranges(idx for idx in self.rows if idx <= self.cursor)
+        columns = self._done_columns()
+        if not ranges and not columns:
+            return
+        checked = self._read_rows(ranges, columns or ())
+        if columns:
+            changed = self._changed_done(*checked)
+            if changed:
+                # Row ✅ ditimpa / dikosongkan operator → baca penuh lagi
+                self._read_rows(self._row_ranges(changed))
+
+    def poll(self):
+        # Return list (row_idx, row) yang belum ✅, urut sesuai sheet
+        if self.polls % self.full_resync_every == 0:
+            self._full_read()
+        else:
+            self._read_unfinished()
+            self._read_tail()
+        self.polls += 1
+        return sorted(self.rows.items())
+
+
+def read_knack_account(sheet):
+    # Email di I1, Password di K1 → satu ranged call
+    with metrics.sheets_call(sheet.title, "get"):
+        values = sheet.get("I1:K1")
+    row = values[0] if values else []
+    row = list(row) + [""] * (3 - len(row))
+    return str(row[0] or "").strip(), str(row[2] or "").strip()
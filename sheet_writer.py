@@ -0,0 +1,125 @@
+# sheet_writer.py
+# Buffer write-back hasil row per worksheet: dikumpulkan lalu dikirim sekali batch_update.
+# Flush kalau buffer penuh, interval lewat, atau saat shutdown (atexit / SIGTERM).
+
+import atexit
+import signal
+import sys
+import threading
+import weakref
+
+from gspread.utils import rowcol_to_a1
+
+import metrics
+
+_buffers = weakref.WeakSet()
+_buffers_lock = threading.Lock()
+
+
+class SheetWriteBuffer:
+    def __init__(self, sheet, logs_col, ts_col, max_rows=20, interval=5.0, log_func=print, on_written=None):
+        self.sheet = sheet
+        self.logs_col = logs_col
+        self.ts_col = ts_col
+        self.max_rows = max_rows
+        self.interval = interval
+        self.log = log_func
+        self.on_written = on_written  # dipanggil dengan {row idx: [log_msg, timestamp]} setelah batch_update sukses
+        self.pending = {}  # row idx → [log_msg, timestamp], row yang sama cukup ditulis sekali
+        self.flushing = {}  # row yang sedang dikirim batch_update, belum pasti masuk sheet
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.timer = threading.Thread(target=self._timer_loop, daemon=True)
+        self.timer.start()
+        with _buffers_lock:
+            _buffers.add(self)
+
+    def add(self, row_idx, log_msg, timestamp):
+        with self.lock:
+            self.pending[row_idx] = [log_msg, timestamp]
+            full = len(self.pending) >= self.max_rows
+        if full:
+            self.flush()
+
+    def has_pending(self, row_idx):
+        # True selama hasil row ini belum pasti masuk sheet (masih di buffer / sedang dikirim)
+        with self.lock:
+            return row_idx in self.pending or row_idx in self.flushing
+
+    def _range(self, row_idx):
+        if self.ts_col == self.logs_col + 1:
+            return f"{rowcol_to_a1(row_idx, self.logs_col)}:{rowcol_to_a1(row_idx, self.ts_col)}"
+        return None
+
+    def _build_updates(self, rows):
+        updates = []
+        for row_idx, (log_msg, timestamp) in sorted(rows.items()):
+            cell_range = self._range(row_idx)
+            if cell_range:
+                updates.append({"range": cell_range, "values": [[log_msg, timestamp]]})
+            else:
+                updates.append({"range": rowcol_to_a1(row_idx, self.logs_col), "values": [[log_msg]]})
+                updates.append({"range": rowcol_to_a1(row_idx, self.ts_col), "values": [[timestamp]]})
+        return updates
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                rows, self.pending = self.pending, {}
+                self.flushing = rows
+            if not rows:
+                return 0
+            try:
+                with metrics.sheets_call(self.sheet.title, "batch_update"):
+                    self.sheet.batch_update(self._build_updates(rows))
+            except Exception as e:
+                # Balikin ke buffer, jangan timpa hasil yang lebih baru
+                with self.lock:
+                    for row_idx, values in rows.items():
+                        self.pending.setdefault(row_idx, values)
+                    self.flushing = {}
+                self.log(f"[{self.sheet.title}] ⚠️ batch_update gagal ({len(rows)} row): {type(e).__name__} - {e}")
+                return 0
+            if self.on_written:
+                try:
+                    self.on_written(rows)
+                except Exception as e:
+                    self.log(f"[{self.sheet.title}] ⚠️ Callback write-back gagal: {type(e).__name__} - {e}")
+            with self.lock:
+                self.flushing = {}
+            self.log(f"[{self.sheet.title}] 📝 {len(rows)} row ditulis dalam 1 batch_update")
+            return len(rows)
+
+    def _timer_loop(self):
+        while not self.closed.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        self.flush()
+        with _buffers_lock:
+            _buffers.discard(self)
+
+
+def flush_all():
+    with _buffers_lock:
+        buffers = list(_buffers)
+    for buf in buffers:
+        buf.flush()
+
+
+def install_shutdown_hooks(stop_event=None, signals=(signal.SIGTERM,)):
+    # Satu-satunya tempat jaminan flush saat shutdown. Panggil dari main thread (signal handler cuma bisa di sana).
+    # stop_event ada → signal = drain (row yang jalan diselesaikan, buffer di-flush saat exit);
+    # tanpa stop_event → flush lalu exit langsung
+    def handle(signum, frame):
+        if stop_event is not None:
+            stop_event.set()
+            return
+        flush_all()
+        sys.exit(128 + signum)
+
+    atexit.register(flush_all)
+    for signum in signals:
+        signal.signal(signum, handle)
@@ -0,0 +1,211 @@
+# sheets_client.py
+# Satu client Google Sheets per proses (authorize sekali, spreadsheet di-cache per URL), semua call lewat
+# token bucket sesuai kuota per menit. State bucket disimpan di SQLite, jadi dibagi semua proses worker.
+# Write-back hasil didahulukan: selama ada write yang antri, read (poll) menunggu.
+# 429 / 5xx → backoff eksponensial (ikut Retry-After kalau ada), 429 juga menahan bucket untuk semua proses.
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import gspread
+
+import logger
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+READ = "read"
+WRITE = "write"
+
+READ_METHODS = {
+    "get", "batch_get", "get_all_values", "get_all_records", "row_values", "col_values", "cell", "acell",
+    "worksheet", "worksheets", "values_get", "values_batch_get", "fetch_sheet_metadata",
+}
+WRITE_METHODS = {
+    "update", "update_cell", "update_acell", "batch_update", "append_row", "append_rows", "insert_row",
+    "insert_rows", "delete_rows", "add_worksheet", "values_update", "values_batch_update", "values_append",
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Read mengalah kalau ada write yang menunggu dalam jendela ini (detik)
+WRITE_PRIORITY_WINDOW = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    kind TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0,
+    write_waiting REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class SheetsRateLimiter:
+    def __init__(self, path=None, read_per_min=None, write_per_min=None):
+        self.path = path or os.getenv("SHEETS_LIMITER_PATH") or os.path.join(SCRIPT_DIR, ".sheets_quota.sqlite3")
+        # Default = kuota Sheets API per user per menit (read & write dihitung terpisah)
+        self.rates = {
+            READ: float(read_per_min or os.getenv("SHEETS_READ_PER_MIN") or 60),
+            WRITE: float(write_per_min or os.getenv("SHEETS_WRITE_PER_MIN") or 60),
+        }
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(SCHEMA)
+        now = time.time()
+        for kind in (READ, WRITE):
+            self.conn.execute("INSERT OR IGNORE INTO buckets (kind, tokens, updated) VALUES (?, ?, ?)",
+                              (kind, self.capacity(kind), now))
+
+    def capacity(self, kind):
+        # Burst maksimal 1/6 kuota (≈10 detik), biar tidak habis sekaligus di awal menit
+        return max(1.0, self.rates[kind] / 6)
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _try_take(self, kind):
+        # Return 0 kalau token didapat, selain itu berapa detik harus menunggu
+        now = time.time()
+        with self._transaction() as conn:
+            rows = {r[0]: r[1:] for r in conn.execute(
+                "SELECT kind, tokens, updated, paused_until, write_waiting FROM buckets")}
+            tokens, updated, paused_until, _ = rows[kind]
+            tokens = min(self.capacity(kind), tokens + (now - updated) * self.rates[kind] / 60)
+            wait = 0.0
+            if now < paused_until:
+                wait = paused_until - now
+            elif kind == READ and now - rows[WRITE][3] < WRITE_PRIORITY_WINDOW:
+                wait = 0.1
+            elif tokens < 1:
+                wait = (1 - tokens) * 60 / self.rates[kind]
+            else:
+                tokens -= 1
+            conn.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE kind = ?", (tokens, now, kind))
+            if kind == WRITE:
+                conn.execute("UPDATE buckets SET write_waiting = ? WHERE kind = ?", (now if wait else 0, WRITE))
+        return wait
+
+    def acquire(self, kind):
+        waited = 0.0
+        while True:
+            wait = self._try_take(kind)
+            if not wait:
+                return waited
+            wait = min(wait, 1.0)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, kind, seconds):
+        # Setelah 429 semua proses ikut menahan bucket ini
+        until = time.time() + seconds
+        with self._transaction() as conn:
+            conn.execute("UPDATE buckets SET paused_until = MAX(paused_until, ?), tokens = 0 WHERE kind = ?",
+                         (until, kind))
+
+
+def _status(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class SheetsClient:
+    def __init__(self, gspread_client, limiter=None, max_retries=None, backoff_base=None, backoff_max=None):
+        self.client = gspread_client
+        self.limiter = limiter or SheetsRateLimiter()
+        self.max_retries = int(max_retries or os.getenv("SHEETS_MAX_RETRIES") or 6)
+        self.backoff_base = float(backoff_base or os.getenv("SHEETS_BACKOFF") or 2)
+        self.backoff_max = float(backoff_max or os.getenv("SHEETS_BACKOFF_MAX") or 64)
+        self.spreadsheets = {}
+        self.lock = threading.Lock()
+
+    def call(self, kind, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(kind)
+            try:
+                return func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = _status(e)
+                if status not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e) or min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                delay += random.uniform(0, 1)
+                if status == 429:
+                    self.limiter.pause(kind, delay)
+                logger.log(f"[sheets] ⏳ HTTP {status} pada {getattr(func, '__name__', func)}, "
+                           f"retry {attempt + 1}/{self.max_retries} dalam {delay:.1f}s", "WARNING")
+                time.sleep(delay)
+
+    def open_by_url(self, url):
+        with self.lock:
+            spreadsheet = self.spreadsheets.get(url)
+            if spreadsheet is None:
+                spreadsheet = LimitedSpreadsheet(self.call(READ, self.client.open_by_url, url), self)
+                self.spreadsheets[url] = spreadsheet
+            return spreadsheet
+
+
+class _Limited:
+    # Proxy: method API gspread lewat limiter, atribut lain (title, id, ...) diteruskan apa adanya
+    def __init__(self, target, client):
+        self._target = target
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr) or (name not in READ_METHODS and name not in WRITE_METHODS):
+            return attr
+        kind = WRITE if name in WRITE_METHODS else READ
+
+        def limited(*args, **kwargs):
+            return self._wrap(name, self._client.call(kind, attr, *args, **kwargs))
+
+        return limited
+
+    def _wrap(self, name, result):
+        return result
+
+
+class LimitedSpreadsheet(_Limited):
+    def _wrap(self, name, result):
+        if name in ("worksheet", "add_worksheet"):
+            return LimitedWorksheet(result, self._client)
+        if name == "worksheets":
+            return [LimitedWorksheet(ws, self._client) for ws in result]
+        return result
+
+
+class LimitedWorksheet(_Limited):
+    pass
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(key, factory):
+    # Satu SheetsClient per proses per credential; factory() bikin client gspread yang sudah authorize
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = SheetsClient(factory())
+        return client
@@ -0,0 +1,232 @@
+# supervisor.py
+# Supervisor worker: satu proses per worker sheet, restart dengan backoff kalau crash,
+# drain saat SIGTERM, dan jumlah worker ikut konfigurasi / sheet yang ada (dicek ulang berkala, SIGHUP = cek sekarang).
+# Jalankan: python supervisor.py
+
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+
+# Catatan: jangan import worker di top-level. Proses anak (spawn) ikut import modul ini,
+# dan worker.py harus di-import setelah LOG_FILE anak di-set.
+
+WORKER_SHEET_PREFIX = "Worker-"
+
+
+def _run_worker(sheet_url, json_credential_path, sheet_name):
+    # Entry point proses anak
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C diurus supervisor
+
+    import worker
+    import metrics
+    import sheet_writer
+    sheet_writer.install_shutdown_hooks(stop_event)  # SIGTERM → drain
+    metrics.start_snapshots(sheet_name)
+    worker.worker_process(sheet_url, json_credential_path, sheet_name, stop_event)
+
+
+def discover_worker_sheets(spreadsheet):
+    # Semua sheet Worker-* yang punya akun (email I1, password K1), dibaca dalam satu batch call
+    prefix = os.getenv("WORKER_SHEET_PREFIX") or WORKER_SHEET_PREFIX
+    titles = [ws.title for ws in spreadsheet.worksheets() if ws.title.startswith(prefix)]
+    if not titles:
+        return []
+    resp = spreadsheet.values_batch_get([f"'{title}'!I1:K1" for title in titles])
+    names = []
+    for title, value_range in zip(titles, resp.get("valueRanges", [])):
+        row = (value_range.get("values") or [[]])[0] + ["", "", ""]
+        if str(row[0]).strip() and str(row[2]).strip():
+            names.append(title)
+    return names
+
+
+class WorkerHandle:
+    def __init__(self, name):
+        self.name = name
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_start = 0.0
+        self.retiring = False
+
+
+class Supervisor:
+    def __init__(self, sheet_url, json_credential_path, discover_interval=None, max_workers=None,
+                 drain_timeout=None, backoff_base=None, backoff_max=None):
+        import worker
+        self.worker = worker
+        self.log = worker.log
+        self.sheet_url = sheet_url
+        self.json_credential_path = json_credential_path
+        self.discover_interval = float(discover_interval or os.getenv("DISCOVER_INTERVAL") or 60)
+        # 0 = tanpa batas, satu proses per akun yang ada
+        self.max_workers = int(max_workers or os.getenv("MAX_WORKERS") or 0)
+        self.drain_timeout = float(drain_timeout or os.getenv("DRAIN_TIMEOUT") or 60)
+        self.backoff_base = float(backoff_base or os.getenv("RESTART_BACKOFF") or 5)
+        self.backoff_max = float(backoff_max or os.getenv("RESTART_BACKOFF_MAX") or 300)
+        self.ctx = mp.get_context("spawn")
+        self.handles = {}
+        self.stopping = False
+        self.rediscover = True
+        self.spreadsheet = None
+        self.browser_cap = None
+
+    # === Discovery ===
+    def discover(self):
+        # WORKER_SHEETS="Worker-1,Worker-3" menang; kalau kosong, ambil semua sheet Worker-* yang punya akun di I1/K1
+        configured = os.getenv("WORKER_SHEETS")
+        if configured:
+            names = [name.strip() for name in configured.split(",") if name.strip()]
+            return self._cap(names)
+        if self.spreadsheet is None:
+            client = self.worker.get_gsheet_client(self.json_credential_path)
+            self.spreadsheet = client.open_by_url(self.sheet_url)
+        return self._cap(discover_worker_sheets(self.spreadsheet))
+
+    def _cap(self, names):
+        names = names[:self.max_workers] if self.max_workers else names
+        if self.worker.SUBMIT_BACKEND != "http":
+            names = self._cap_browsers(names)
+        return names
+
+    def _cap_browsers(self, names):
+        # Satu browser per worker: jumlah worker ikut memory host / footprint browser yang terukur
+        from driver_pool import browser_capacity
+        running = [h for h in self.handles.values()
+                   if h.process is not None and h.process.is_alive() and not h.retiring]
+        capacity = browser_capacity(len(running))
+        if capacity is None or capacity >= len(names):
+            self.browser_cap = None
+            return names
+        if capacity != self.browser_cap:
+            self.browser_cap = capacity
+            self.log(f"[supervisor] 🧮 Memory host cukup untuk {capacity} browser, "
+                     f"{len(names) - capacity} worker ditunda", "WARNING")
+        # Worker yang sudah jalan didahulukan, biar tidak dimatikan hanya untuk diganti yang lain
+        names = [n for n in names if n in self.handles] + [n for n in names if n not in self.handles]
+        return names[:capacity]
+
+    def scale(self, names):
+        wanted = set(names)
+        for name in names:
+            handle = self.handles.get(name)
+            if handle is None:
+                self.handles[name] = WorkerHandle(name)
+                self.log(f"[supervisor] ➕ Worker baru: {name}")
+            elif handle.retiring:
+                handle.retiring = False
+        for name, handle in self.handles.items():
+            if name not in wanted and not handle.retiring:
+                handle.retiring = True
+                self.log(f"[supervisor] ➖ Worker dikurangi: {name} (drain)")
+                self._terminate(handle)
+
+    # === Proses ===
+    def _start(self, handle):
+        log_file = os.getenv("LOG_FILE")
+        # Tiap proses punya file log sendiri, biar rotasi tidak rebutan file
+        os.environ["LOG_FILE"] = f"log_{handle.name}.txt"
+        try:
+            handle.process = self.ctx.Process(
+                target=_run_worker,
+                args=(self.sheet_url, self.json_credential_path, handle.name),
+                name=f"worker-{handle.name}",
+            )
+            handle.process.start()
+        finally:
+            if log_file is None:
+                os.environ.pop("LOG_FILE", None)
+            else:
+                os.environ["LOG_FILE"] = log_file
+        handle.started_at = time.monotonic()
+        self.log(f"[supervisor] 🚀 {handle.name} jalan (pid {handle.process.pid})")
+
+    def _terminate(self, handle):
+        if handle.process is not None and handle.process.is_alive():
+            handle.process.terminate()  # SIGTERM → worker drain
+
+    def _reap(self):
+        now = time.monotonic()
+        for name in list(self.handles):
+            handle = self.handles[name]
+            proc = handle.process
+            if proc is None and handle.retiring:
+                del self.handles[name]
+                continue
+            if proc is None or proc.is_alive():
+                continue
+            proc.join()
+            handle.process = None
+            if handle.retiring or self.stopping:
+                self.log(f"[supervisor] 🛑 {name} berhenti (exit {proc.exitcode})")
+                if handle.retiring:
+                    del self.handles[name]
+                continue
+            # Jalan stabil > backoff_max → hitungan restart di-reset
+            if now - handle.started_at > self.backoff_max:
+                handle.restarts = 0
+            delay = min(self.backoff_max, self.backoff_base * (2 ** handle.restarts))
+            handle.restarts += 1
+            handle.next_start = now + delay
+            self.log(f"[supervisor] ⚠️ {name} mati (exit {proc.exitcode}), restart dalam {delay:.0f}s", "WARNING")
+
+    def _start_due(self):
+        now = time.monotonic()
+        for handle in self.handles.values():
+            if handle.process is None and not handle.retiring and now >= handle.next_start:
+                self._start(handle)
+
+    # === Loop utama ===
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _handle_hup(self, signum, frame):
+        self.rediscover = True
+
+    def run(self):
+        import metrics
+        metrics.serve(own_name="supervisor")
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_hup)
+        last_discover = 0.0
+        while not self.stopping:
+            if self.rediscover or time.monotonic() - last_discover >= self.discover_interval:
+                self.rediscover = False
+                last_discover = time.monotonic()
+                try:
+                    self.scale(self.discover())
+                except Exception as e:
+                    self.log(f"[supervisor] ⚠️ Discovery gagal: {type(e).__name__} - {e}", "WARNING")
+            self._reap()
+            self._start_due()
+            time.sleep(1)
+        self.shutdown()
+
+    def shutdown(self):
+        self.log("[supervisor] 🛑 Drain semua worker ...")
+        for handle in self.handles.values():
+            self._terminate(handle)
+        deadline = time.monotonic() + self.drain_timeout
+        for handle in self.handles.values():
+            if handle.process is not None:
+                handle.process.join(max(0.0, deadline - time.monotonic()))
+                if handle.process.is_alive():
+                    self.log(f"[supervisor] ⚠️ {handle.name} tidak selesai drain, di-kill", "WARNING")
+                    handle.process.kill()
+                    handle.process.join()
+        self.log("[supervisor] 🛑 Semua worker dihentikan")
+        import metrics
+        metrics.write_summary("supervisor")
+
+
+def main():
+    import worker
+    Supervisor(worker.SHEET_URL, worker.JSON_CRED).run()
+
+
+if __name__ == "__main__":
+    main()
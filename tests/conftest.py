@@ -0,0 +1,6 @@
+# Modul repo flat di root, test dijalankan dari mana saja: python -m pytest -q
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_CONSOLE", "0")
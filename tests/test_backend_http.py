@@ -0,0 +1,67 @@
+import pytest
+
+import knack_stub
+from backend import HttpBackend, SessionExpired, SubmitError
+from helper import KNOWN_LOCATIONS
+
+IMEI = "350000000000006"
+
+
+@pytest.fixture
+def stub():
+    state = knack_stub.KnackStubState(imeis=[IMEI], accounts={"ops@example.com": "rahasia"})
+    server, state = knack_stub.serve(state)
+    yield state, f"{knack_stub.base_url(server)}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def backend(stub):
+    state, api_url = stub
+    b = HttpBackend(knack_stub.STUB_APP_ID, api_url=api_url, timeout=5)
+    assert b.login("ops@example.com", "rahasia")
+    yield b
+    b.close()
+
+
+def test_login_rejects_wrong_password(stub):
+    _, api_url = stub
+    b = HttpBackend(knack_stub.STUB_APP_ID, api_url=api_url, timeout=5)
+    assert not b.login("ops@example.com", "salah")
+    assert b.token is None
+
+
+def test_location_lookup(backend, stub):
+    state, _ = stub
+    expected = next(loc["id"] for loc in state.locations if loc["identifier"] == KNOWN_LOCATIONS[0])
+    assert backend.location_id(KNOWN_LOCATIONS[0]) == expected
+    assert KNOWN_LOCATIONS[0] in backend.location_names()
+    with pytest.raises(ValueError):
+        backend.location_id("Gudang Tidak Ada")
+
+
+def test_rental_lookup(backend):
+    assert backend.rental_id(IMEI) == f"rent{IMEI}"
+    with pytest.raises(SubmitError, match="tidak ditemukan di Knack"):
+        backend.rental_id("350000000000014")
+
+
+def test_submit_creates_record(backend, stub):
+    state, _ = stub
+    assert backend.submit({"IMEI": IMEI, "Status": "ready", "Location": KNOWN_LOCATIONS[0]})
+    assert len(state.records) == 1
+    record = state.records[0]
+    assert record["field_961"] == "READY"
+    assert record["field_1037"] == [f"rent{IMEI}"]
+
+
+def test_expired_session_raises_and_reauthenticates(backend, stub):
+    state, _ = stub
+    state.tokens.clear()
+    row = {"IMEI": IMEI, "Status": "READY", "Location": KNOWN_LOCATIONS[0]}
+    with pytest.raises(SessionExpired):
+        backend.submit(row)
+    assert backend.reauthenticate()
+    assert backend.submit(row)
+    assert len(state.records) == 1
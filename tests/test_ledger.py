@@ -0,0 +1,62 @@
+import pytest
+
+import ledger as ledger_module
+from ledger import DUPLICATE_PREFIX, SUBMITTED, UNCERTAIN_MSG, Ledger
+
+IMEI = "350000000000006"
+OK = "✅ Submit sukses"
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    db = Ledger(str(tmp_path / "ledger.sqlite3"))
+    yield db
+    db.close()
+
+
+def test_new_row_is_allowed(ledger):
+    assert ledger.resolve(IMEI, "W1", 2) is None
+
+
+def test_unwritten_success_is_replayed(ledger):
+    ledger.begin(IMEI, "W1", 2)
+    ledger.finish(IMEI, "W1", 2, True, OK)
+    assert ledger.resolve(IMEI, "W1", 2) == OK
+
+
+def test_written_success_allows_new_stock_in(ledger, monkeypatch):
+    ledger.begin(IMEI, "W1", 2)
+    ledger.finish(IMEI, "W1", 2, True, OK)
+    ledger.mark_written("W1", {2: [OK, "2026-01-01 10:00:00"]})
+    assert ledger.get(IMEI, "W1", 2) == (SUBMITTED, OK, 1)
+    # Row yang sama dikosongkan lagi → attempt baru
+    assert ledger.resolve(IMEI, "W1", 2) is None
+    # Row lain: masih dalam window → duplikat, setelah window lewat → boleh
+    assert ledger.resolve(IMEI, "W2", 5).startswith(DUPLICATE_PREFIX)
+    monkeypatch.setattr(ledger_module, "DEDUP_WINDOW", 0)
+    assert ledger.resolve(IMEI, "W3", 7) is None
+
+
+def test_duplicate_of_in_flight_row(ledger):
+    ledger.begin(IMEI, "W1", 2)
+    message = ledger.resolve(IMEI, "W2", 3)
+    assert message.startswith(DUPLICATE_PREFIX)
+    assert "sedang disubmit dari W1 row 1" in message
+    # Logs belum dikosongkan → tetap duplikat; dikosongkan → operator memang mau submit
+    assert ledger.resolve(IMEI, "W2", 3, logs=message) == message
+    assert ledger.resolve(IMEI, "W2", 3, logs="") is None
+
+
+def test_crash_during_submit_is_uncertain_until_logs_cleared(ledger):
+    ledger.begin(IMEI, "W1", 2)
+    assert ledger.resolve(IMEI, "W1", 2, logs="") == UNCERTAIN_MSG
+    assert ledger.resolve(IMEI, "W1", 2, logs=UNCERTAIN_MSG) == UNCERTAIN_MSG
+    assert ledger.resolve(IMEI, "W1", 2, logs="") is None
+    # Row tidak pasti tidak menahan row lain
+    assert ledger.resolve(IMEI, "W2", 3) is None
+
+
+def test_failed_row_is_retried(ledger):
+    ledger.begin(IMEI, "W1", 2)
+    ledger.finish(IMEI, "W1", 2, False, "❌ Error: timeout")
+    assert ledger.resolve(IMEI, "W1", 2, logs="❌ Error: timeout") is None
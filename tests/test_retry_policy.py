@@ -0,0 +1,64 @@
+import pytest
+from selenium.common.exceptions import (InvalidSelectorException, InvalidSessionIdException,
+                                        TimeoutException, WebDriverException)
+
+from backend import SessionExpired, SubmitError
+from retry_policy import PARKED_PREFIX, PERMANENT, TRANSIENT, RetryScheduler, classify
+
+ROW = {"IMEI": "350000000000006", "Status": "READY", "Location": "Menara Caraka", "Logs": ""}
+
+
+@pytest.mark.parametrize("error, kind", [
+    (TimeoutException("lambat"), TRANSIENT),
+    (InvalidSessionIdException("session hilang"), TRANSIENT),
+    (WebDriverException("chrome not reachable"), TRANSIENT),
+    (InvalidSelectorException("xpath salah"), PERMANENT),
+    (SessionExpired("HTTP 401"), TRANSIENT),
+    (ValueError("Unknown status: RUSAK"), PERMANENT),
+    (SubmitError("IMEI 1 tidak ditemukan di Knack"), PERMANENT),
+    (SubmitError("Submit API gagal: HTTP 422 - invalid"), PERMANENT),
+    (SubmitError("Submit API gagal: HTTP 500"), TRANSIENT),
+])
+def test_classify(error, kind):
+    assert classify(error) == kind
+
+
+def test_transient_failure_waits_for_backoff():
+    retries = RetryScheduler(max_attempts=3, base_delay=10, max_delay=100)
+    assert retries.due("W1", 2, ROW, now=1.0)
+    msg = retries.failed("W1", 2, ROW, TimeoutException("lambat"))
+    assert msg.startswith("❌ Error") and "retry 1/2" in msg
+    state = retries.states[("W1", 2)]
+    assert not retries.due("W1", 2, ROW, now=state.next_at - 1)
+    assert retries.due("W1", 2, ROW, now=state.next_at + 1)
+    assert retries.is_retry("W1", 2)
+
+
+def test_attempts_exhausted_parks_row():
+    retries = RetryScheduler(max_attempts=2, base_delay=1, max_delay=1)
+    retries.failed("W1", 2, ROW, TimeoutException("lambat"))
+    msg = retries.failed("W1", 2, ROW, TimeoutException("lambat"))
+    assert msg.startswith(PARKED_PREFIX)
+    assert not retries.due("W1", 2, ROW, now=1e12)
+
+
+def test_permanent_failure_parked_until_row_edited():
+    retries = RetryScheduler()
+    msg = retries.failed("W1", 2, ROW, ValueError("Unknown status: RUSAK"))
+    assert msg.startswith(PARKED_PREFIX)
+    assert not retries.due("W1", 2, dict(ROW, Logs=msg), now=1e12)
+    assert retries.due("W1", 2, dict(ROW, Status="BROKEN", Logs=msg), now=1e12)
+
+
+def test_parked_logs_from_previous_run_released_when_cleared():
+    retries = RetryScheduler()
+    assert not retries.due("W1", 2, dict(ROW, Logs=f"{PARKED_PREFIX} Gagal permanen: x"))
+    assert retries.due("W1", 2, ROW)
+
+
+def test_success_forgets_history():
+    retries = RetryScheduler(base_delay=1000)
+    retries.failed("W1", 2, ROW, TimeoutException("lambat"))
+    retries.succeeded("W1", 2)
+    assert not retries.is_retry("W1", 2)
+    assert retries.due("W1", 2, ROW)
@@ -0,0 +1,67 @@
+import pytest
+
+from fake_sheets import FakeClient, make_worker_spreadsheet
+from sheet_reader import IncrementalSheetReader
+
+DONE = "✅ Submit sukses"
+
+
+@pytest.fixture
+def sheet():
+    client = FakeClient()
+    ws = next(iter(make_worker_spreadsheet(client, 1, 5).sheets.values()))
+    headers = ws.row_values(1)
+    for name in ("Logs", "TimeStamp"):
+        headers.append(name)
+        ws.update_cell(1, len(headers), name)
+    return client, ws, headers
+
+
+def col(headers, name):
+    return headers.index(name) + 1
+
+
+def test_first_poll_reads_everything(sheet):
+    _, ws, headers = sheet
+    reader = IncrementalSheetReader(ws, headers)
+    rows = reader.poll()
+    assert [idx for idx, _ in rows] == [2, 3, 4, 5, 6]
+    assert rows[0][1]["IMEI"] == ws.data[1][0]
+
+
+def test_finished_rows_dropped_and_new_rows_picked_up(sheet):
+    client, ws, headers = sheet
+    reader = IncrementalSheetReader(ws, headers)
+    reader.poll()
+    ws.update_cell(2, col(headers, "Logs"), DONE)
+    ws.update_cell(7, 1, "350000000000014")
+    calls = client.total_calls()
+    rows = reader.poll()
+    assert [idx for idx, _ in rows] == [3, 4, 5, 6, 7]
+    # Poll biasa: satu batch_get + satu get tail, bukan full read
+    assert client.total_calls() - calls == 2
+    assert client.calls["get_all_values"] == 1
+
+
+def test_overwritten_finished_rows_seen_without_full_resync(sheet):
+    _, ws, headers = sheet
+    reader = IncrementalSheetReader(ws, headers, full_resync_every=1000)
+    reader.poll()
+    for idx in range(2, 7):
+        ws.update_cell(idx, col(headers, "Logs"), DONE)
+    assert reader.poll() == []
+    # Operator tempel batch baru di atas row yang sudah selesai
+    ws.update_cell(2, 1, "490154203237518")
+    ws.update_cell(2, col(headers, "Logs"), "")
+    ws.update_cell(3, col(headers, "Logs"), "")
+    rows = reader.poll()
+    assert [(idx, row["IMEI"]) for idx, row in rows] == [(2, "490154203237518"), (3, ws.data[2][0])]
+
+
+def test_full_resync_period_from_env(sheet, monkeypatch):
+    client, ws, headers = sheet
+    monkeypatch.setenv("SHEET_FULL_RESYNC_EVERY", "2")
+    reader = IncrementalSheetReader(ws, headers)
+    for _ in range(4):
+        reader.poll()
+    assert client.calls["get_all_values"] == 2
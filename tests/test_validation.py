@@ -0,0 +1,51 @@
+from validation import REJECT_PREFIX, RowValidator, luhn_check_digit
+
+IMEI = "350000000000006"
+
+
+def check(row, **kwargs):
+    accepted, rejected = RowValidator(**kwargs).validate([(2, row)])
+    return accepted, rejected
+
+
+def test_luhn_check_digit():
+    assert luhn_check_digit("35000000000000") == "6"
+    assert luhn_check_digit("49015420323751") == "8"
+
+
+def test_clean_row_is_normalized():
+    accepted, rejected = check({"IMEI": f" '{IMEI} ", "Status": "ready", "Location": "  menara   caraka "},
+                               locations=["Menara Caraka"])
+    assert rejected == []
+    assert accepted[0][1] == {"IMEI": IMEI, "Status": "READY", "Location": "Menara Caraka"}
+
+
+def test_scientific_notation_expanded_when_digits_complete():
+    accepted, _ = check({"IMEI": "3.50000000000006E+14", "Status": "READY", "Location": "X"})
+    assert accepted[0][1]["IMEI"] == IMEI
+
+
+def test_scientific_notation_rejected_when_digits_lost():
+    _, rejected = check({"IMEI": "3.5E+14", "Status": "READY", "Location": "X"})
+    assert rejected[0][2].startswith(REJECT_PREFIX)
+    assert "notasi ilmiah" in rejected[0][2]
+
+
+def test_float_suffix_stripped():
+    accepted, _ = check({"IMEI": f"{IMEI}.0", "Status": "READY", "Location": "X"})
+    assert accepted[0][1]["IMEI"] == IMEI
+
+
+def test_luhn_failure_rejected_unless_disabled():
+    row = {"IMEI": "350000000000007", "Status": "READY", "Location": "X"}
+    _, rejected = check(row)
+    assert "Luhn" in rejected[0][2]
+    accepted, _ = check(row, check_luhn=False)
+    assert accepted
+
+
+def test_length_status_and_location():
+    assert "15 digit" in check({"IMEI": "12345", "Status": "READY", "Location": "X"})[1][0][2]
+    assert "Status tidak dikenal" in check({"IMEI": IMEI, "Status": "RUSAK", "Location": "X"})[1][0][2]
+    _, rejected = check({"IMEI": IMEI, "Status": "READY", "Location": "Gudang"}, locations=["Menara Caraka"])
+    assert "Location tidak ada di Knack" in rejected[0][2]
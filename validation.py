@@ -0,0 +1,107 @@
+# validation.py
+# Validasi + normalisasi batch row sebelum masuk browser / API (Python biasa, tanpa pandas biar import worker ringan).
+# IMEI dirapikan (float "3.5e+14", ".0", spasi, petik), dicek panjang & Luhn; Status & Location dipetakan.
+# Row yang ditolak langsung dapat alasan, jadi tidak buang waktu browser.
+
+import os
+import re
+
+from helper import STATUS_VALUES
+
+IMEI_LENGTH = 15
+REJECT_PREFIX = "❌ Invalid:"
+IMEI_NOISE = re.compile(r"^'|[\s\-]")
+SCIENTIFIC = re.compile(r"\d+(\.\d+)?[eE]\+?\d+")
+TRAILING_ZERO = re.compile(r"\.0+$")
+DIGITS = re.compile(r"[0-9]+")
+
+
+def luhn_check_digit(body):
+    total = 0
+    for i, ch in enumerate(reversed(str(body))):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+def normalize_location(text):
+    return re.sub(r"\s+", " ", str(text)).strip().casefold()
+
+
+def _expand_scientific(value):
+    mantissa, exponent = value.lower().split("e")
+    whole, _, frac = mantissa.partition(".")
+    exponent = int(exponent)
+    # Mantissa kurang digit → angka asli sudah terpotong di sheet, biarkan (nanti ditolak)
+    if len(frac) < exponent or len(frac.rstrip("0")) > exponent:
+        return value
+    return whole + frac[:exponent]
+
+
+def _luhn_valid(imei):
+    return luhn_check_digit(imei[:-1]) == imei[-1]
+
+
+def _text(value):
+    return "" if value is None or value != value else str(value)  # value != value → NaN dari Excel
+
+
+class RowValidator:
+    def __init__(self, locations=None, check_luhn=None):
+        self.check_luhn = (os.getenv("IMEI_LUHN", "1") != "0") if check_luhn is None else check_luhn
+        self.locations = {}  # lokasi ternormalisasi → nama asli di Knack
+        if locations:
+            self.learn_locations(locations)
+
+    def learn_locations(self, names):
+        # Daftar lokasi dari Knack (backend); selama belum ada, Location tidak dicek di sini
+        if names:
+            self.locations = {normalize_location(name): name for name in names}
+
+    def _reason(self, imei, raw_imei, status, raw_status, location, raw_location):
+        if imei == "":
+            return "IMEI kosong"
+        if "e" in imei or "E" in imei:
+            return "IMEI jadi notasi ilmiah (digit hilang), format kolom IMEI sebagai teks"
+        if not DIGITS.fullmatch(imei):
+            return f"IMEI bukan angka: {raw_imei}"
+        if len(imei) != IMEI_LENGTH:
+            return f"IMEI harus {IMEI_LENGTH} digit: {imei}"
+        if self.check_luhn and not _luhn_valid(imei):
+            return f"Checksum IMEI (Luhn) salah: {imei}"
+        if status is None:
+            return f"Status tidak dikenal: {raw_status}"
+        if not location:
+            return f"Location tidak ada di Knack: {raw_location}"
+        return ""
+
+    def validate(self, rows):
+        # rows: list (row_idx, row dict) → (accepted [(idx, row ternormalisasi)], rejected [(idx, row, alasan)])
+        accepted, rejected = [], []
+        for idx, row in rows:
+            raw_imei = _text(row.get("IMEI"))
+            raw_status = _text(row.get("Status"))
+            raw_location = _text(row.get("Location"))
+
+            imei = IMEI_NOISE.sub("", raw_imei.strip())
+            if SCIENTIFIC.fullmatch(imei):
+                imei = _expand_scientific(imei.replace("+", ""))
+            imei = TRAILING_ZERO.sub("", imei)
+            status = STATUS_VALUES.get(raw_status.strip().upper())
+            if self.locations:
+                location = self.locations.get(normalize_location(raw_location))
+            else:
+                location = raw_location.strip()
+
+            why = self._reason(imei, raw_imei, status, raw_status, location, raw_location)
+            if why:
+                rejected.append((idx, row, f"{REJECT_PREFIX} {why}"))
+                continue
+            clean = dict(row)
+            clean.update(IMEI=imei, Status=status, Location=location)
+            accepted.append((idx, clean))
+        return accepted, rejected
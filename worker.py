@@ -7,25 +7,32 @@ from dotenv import load_dotenv
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import threading
-from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import StaleElementReferenceException
-import tempfile
-import shutil
 
 from helper import (
-    get_location_xpath,
     get_xpath,
     get_status_value,
-    setup_driver,
 )
+from driver_pool import DriverPool, setup_driver
+from backend import HttpBackend, SeleniumBackend, SessionExpired, SubmitUncertain
+import fast_fill
+import location_index
+import metrics
+import readiness
+import screenshots
+import logger
+from session_cache import SessionCache
+from sheet_writer import SheetWriteBuffer
+from sheets_client import shared_client
+from pipeline import RowPipeline
+from sheet_reader import IncrementalSheetReader, read_knack_account
+from validation import RowValidator
+from ledger import Ledger, UNCERTAIN_MSG
+from retry_policy import PARKED_PREFIX, RetryScheduler
 
 exit_flag = False
 
@@ -34,6 +41,8 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = os.path.join(SCRIPT_DIR, "config")
 LOG_DIR = os.path.join(SCRIPT_DIR, "logs_worker")
 SCREENSHOT_DIR = os.path.join(SCRIPT_DIR, "screenshots_worker")
+SESSION_DIR = os.path.join(SCRIPT_DIR, ".session_cache")
+LEDGER_PATH = os.getenv("LEDGER_PATH") or os.path.join(SCRIPT_DIR, ".ledger.sqlite3")
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 load_dotenv(dotenv_path=os.path.join(CONFIG_DIR, ".env"))
@@ -41,20 +50,40 @@ load_dotenv(dotenv_path=os.path.join(CONFIG_DIR, ".env"))
 SHEET_URL = os.getenv("GSHEET_URL") or "https://docs.google.com/spreadsheets/d/1mzepZm0EsqUIppLeIMZxRRSROzDMCnsvrEN5RYGJvL4/edit?gid=0#gid=0"
 JSON_CRED = os.getenv("GSHEET_JSON") or r"/www/wwwroot/Worker_Rental_Stock_In/active-bolt-398921-fdef5f0fc06a.json"
 WORKER_SHEETS = [f"Worker-{i}" for i in range(1, 6)]  # Worker-1 sampai Worker-5
+SUBMIT_BACKEND = (os.getenv("SUBMIT_BACKEND") or "selenium").lower()  # "selenium" atau "http"
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL") or 10)  # Jeda antar poll sheet (detik)
 
-def log(msg):
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] {msg}")
-    with open(os.path.join(LOG_DIR, "log.txt"), "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] {msg}\n")
+# Session Knack per akun, dipakai ulang antar restart
+session_cache = SessionCache(SESSION_DIR)
+SESSION_PROBE_TIMEOUT = float(os.getenv("SESSION_PROBE_TIMEOUT") or 5)
+FAST_FILL = os.getenv("FAST_FILL", "1") != "0"  # Isi form lewat 1 script in-page, fallback step-by-step
+
+# Pool browser per proses (supervisor jalankan satu proses per worker sheet)
+row_validator = RowValidator()
+ledger = Ledger(LEDGER_PATH)
+retries = RetryScheduler()
+driver_pool = DriverPool(size=int(os.getenv("DRIVER_POOL_SIZE") or 1), headless=True)
+
+logger.setup(LOG_DIR)
+
+def log(msg, level="INFO", **fields):
+    # Cuma enqueue, file ditulis writer thread di logger.py
+    logger.log(msg, level, **fields)
 
 def save_step(driver, name):
-    path = os.path.join(SCREENSHOT_DIR, f"{name}.png")
-    driver.save_screenshot(path)
+    # Mode & ring buffer diatur screenshots.py (SCREENSHOT_MODE), file ditulis di background
+    try:
+        screenshots.recorder_for(driver, SCREENSHOT_DIR).step(driver, name)
+    except Exception as e:
+        log(f"⚠️ Screenshot {name} gagal: {type(e).__name__}")
 
-def wait_visible_xpath(driver, xpath, timeout=15):
+def wait_visible_xpath(driver, xpath, timeout=None, step=None):
+    # MutationObserver di dalam page, bukan polling WebDriverWait
     try:
-        return WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((By.XPATH, xpath)))
+        elem = readiness.wait_visible(driver, xpath, timeout, step=step)
+        if elem is None:
+            raise TimeoutError(xpath)
+        return elem
     except Exception as e:
         log(f"⚠️ wait_visible_xpath gagal: {xpath} → {type(e).__name__}")
         save_step(driver, f"wait_visible_failed_{xpath[-10:].replace('/', '_')}")
@@ -68,49 +97,61 @@ def force_input(driver, elem, value, label="Input"):
             elem.send_keys(digit)
         for evt in ["input", "change", "blur"]:
             driver.execute_script(f"arguments[0].dispatchEvent(new Event('{evt}', {{ bubbles: true }}));", elem)
-        log(f"⌨️ {label} diketik: {value}")
+        log(f"⌨️ {label} diketik: {value}", "DEBUG", step="imei_input")
     except Exception as e:
         log(f"❌ Gagal input {label}: {type(e).__name__} - {e}")
         save_step(driver, f"error_input_{label.lower()}")
 
+def wait_page_settled(driver):
+    # Ganti sleep retry: tunggu AJAX idle, biasanya cuma ratusan ms
+    if driver is None:
+        return
+    try:
+        readiness.wait_network_idle(driver, step="chosen_retry")
+    except Exception:
+        pass
+
 def retry_action(action_func, max_retry=3, *args, **kwargs):
     for attempt in range(1, max_retry + 1):
         try:
             return action_func(*args, **kwargs)
         except StaleElementReferenceException as e:
             log(f"⚠️ Percobaan ke-{attempt}: StaleElementReferenceException, retry ...")
-            time.sleep(1)
+            wait_page_settled(args[0] if args else None)
         except Exception as e:
             raise
     raise Exception(f"Gagal setelah {max_retry} percobaan: {action_func.__name__}")
 
-def select_chosen_option(driver, dropdown_xpath, option_xpath, label):
+def select_chosen_option(driver, dropdown_xpath, option_xpath, label, container_xpath=None):
     for attempt in range(3):
         try:
             dropdown = wait_visible_xpath(driver, dropdown_xpath)
             if dropdown is None:
                 log(f"⚠️ Dropdown {label} tidak ditemukan (attempt {attempt+1})")
-                time.sleep(1)
+                wait_page_settled(driver)
                 continue
             dropdown.click()
-            time.sleep(0.5)
+            if container_xpath:
+                readiness.wait_chosen_open(driver, container_xpath)
 
             option = wait_visible_xpath(driver, option_xpath)
             if option is None:
                 log(f"⚠️ Option {label} tidak ditemukan (attempt {attempt+1})")
-                time.sleep(1)
+                wait_page_settled(driver)
                 continue
             option.click()
-            log(f"✅ {label} dipilih")
+            if container_xpath:
+                readiness.wait_chosen_closed(driver, container_xpath)
+            log(f"✅ {label} dipilih", "DEBUG", step="location")
             save_step(driver, f"step_chosen_{label.lower()}")
             return True
         except StaleElementReferenceException:
             log(f"⚠️ StaleElementReferenceException pada {label}, retry ...")
-            time.sleep(1)
+            wait_page_settled(driver)
         except Exception as e:
             log(f"❌ Gagal pilih {label}: {type(e).__name__} - {e}")
             save_step(driver, f"error_chosen_{label.lower()}")
-            time.sleep(1)
+            wait_page_settled(driver)
     return False
 
 def select_dropdown_by_value(driver, xpath, value, label="Dropdown"):
@@ -118,7 +159,7 @@ def select_dropdown_by_value(driver, xpath, value, label="Dropdown"):
         elem = wait_visible_xpath(driver, xpath)
         if elem:
             Select(elem).select_by_value(value)
-            log(f"✅ {label} dipilih: {value}")
+            log(f"✅ {label} dipilih: {value}", "DEBUG", step="status")
             save_step(driver, f"step_dropdown_{label.lower()}")
             return True
         else:
@@ -133,7 +174,7 @@ def click_suggestion(driver, xpath):
     try:
         suggestion = wait_visible_xpath(driver, xpath)
         suggestion.click()
-        log("✅ IMEI diklik")
+        log("✅ IMEI diklik", "DEBUG", step="imei_suggestion")
         save_step(driver, "step_imei_suggestion")
         return True
     except Exception as e:
@@ -141,13 +182,14 @@ def click_suggestion(driver, xpath):
         save_step(driver, "error_imei_suggestion")
         return False
 
+@metrics.timed("login")
 def login_knack(driver, url, email, password):
     driver.get(url)
-    log("🔄 Buka halaman login Knack")
+    log("🔄 Buka halaman login Knack", "DEBUG", step="login")
     try:
         wait_visible_xpath(driver, '//input[@type="email"]').send_keys(email)
         driver.find_element(By.XPATH, '//input[@type="password"]').send_keys(password)
-        log("📧 Email dan password diketik")
+        log("📧 Email dan password diketik", "DEBUG", step="login")
         for xpath in [
             '//button[contains(text(), "Login")]',
             '//button[contains(text(), "Sign In")]',
@@ -156,13 +198,14 @@ def login_knack(driver, url, email, password):
         ]:
             try:
                 driver.find_element(By.XPATH, xpath).click()
-                log(f"✅ Klik login berhasil: {xpath}")
+                log(f"✅ Klik login berhasil: {xpath}", "DEBUG", step="login")
                 break
             except:
                 # Hapus log XPath gagal biar nggak spam log
                 pass
-        if wait_visible_xpath(driver, '//div[contains(@id, "view_") and contains(@class, "kn-view")]'):
+        if wait_visible_xpath(driver, get_xpath("knack_view")):
             log("✅ Login sukses, view Knack siap")
+            readiness.wait_network_idle(driver, step="after_login")
             return True
         else:
             log("❌ View Knack tidak muncul setelah login")
@@ -173,77 +216,168 @@ def login_knack(driver, url, email, password):
         save_step(driver, "error_login")
         return False
 
+def knack_session_alive(driver):
+    # Probe murah: view Knack tampil dan form login tidak muncul
+    if readiness.wait_visible(driver, get_xpath("knack_view"), timeout=SESSION_PROBE_TIMEOUT) is None:
+        return False
+    return not driver.execute_script(
+        "const p = document.querySelector('input[type=\"password\"]'); return !!(p && p.offsetParent);"
+    )
+
+def login_knack_cached(driver, url, email, password):
+    try:
+        if session_cache.restore(email, driver, url) and knack_session_alive(driver):
+            log("🔑 Session Knack dipulihkan dari cache, skip login", step="login")
+            readiness.wait_network_idle(driver, step="after_login")
+            return True
+    except Exception as e:
+        log(f"⚠️ Restore session gagal: {type(e).__name__} - {e}", "WARNING", step="login")
+    session_cache.invalidate(email)
+
+    if not login_knack(driver, url, email, password):
+        return False
+    session_cache.save(email, driver)
+    return True
+
 def submit_row(driver, row):
+    if not FAST_FILL:
+        return submit_row_steps(driver, row)
+    location = str(row["Location"])
+    imei = str(row["IMEI"])
+    status_value = get_status_value(str(row["Status"]))
+    try:
+        result = fast_fill.fill(driver, location, status_value, imei) or {}
+    except Exception as e:
+        metrics.step_failed("fast_fill")
+        reason = f"{type(e).__name__} - {e}"
+        try:
+            submitted = fast_fill.abort(driver)
+        except Exception:
+            # Browser / session mati: error asli dilempar (transient), browser di-recycle lalu row dicoba ulang
+            raise e
+        if submitted is not False:
+            # Submit sudah diklik, atau page sudah ganti sehingga tidak bisa dipastikan
+            raise SubmitUncertain(f"Fast-fill terputus setelah Submit: {reason}") from e
+        log(f"⚠️ Fast-fill terputus sebelum Submit: {reason}, lanjut step-by-step", "WARNING", step="fast_fill")
+        wait_page_settled(driver)
+        return submit_row_steps(driver, row)
+    for step, ms in result.get("timings", {}).items():
+        metrics.observe_step(step, ms / 1000)
+    readiness.record_fast_fill(result.get("timings", {}))
+    if not result.get("ok"):
+        metrics.step_failed(result.get("step") or "fast_fill")
+    timings = ", ".join(f"{k}={v}ms" for k, v in result.get("timings", {}).items())
+    if result.get("ok"):
+        log(f"⚡ Fast-fill sukses ({timings})", "DEBUG", step="fast_fill")
+        save_step(driver, "step_fast_fill")
+        return True
+    save_step(driver, "error_fast_fill")
+    if result.get("submitted"):
+        # Submit sudah terkirim, jangan diulang step-by-step biar tidak dobel record
+        error = result.get("error") or "Fast-fill gagal setelah submit"
+        if error.startswith("Knack menolak submit"):
+            raise Exception(error)
+        raise SubmitUncertain(error)
+    log(f"⚠️ Fast-fill gagal di step {result.get('step')}: {result.get('error')} ({timings}), "
+        f"lanjut step-by-step", "WARNING", step="fast_fill")
+    wait_page_settled(driver)
+    return submit_row_steps(driver, row)
+
+def submit_row_steps(driver, row):
     location = str(row["Location"])
     imei = str(row["IMEI"])
     status = str(row["Status"])
 
     xpath_location_dropdown = get_xpath("location_dropdown")
-    xpath_location_option = get_location_xpath(location)
+    xpath_location_container = get_xpath("location_container")
+    locations = location_index.index_for(driver)
+    xpath_location_option = locations.option_xpath(driver, location)
     xpath_status = get_xpath("status_dropdown")
     xpath_rental_input = get_xpath("rental_input")
     xpath_imei_suggestion = get_xpath("imei_suggestion")
     xpath_submit = get_xpath("submit_button")
 
-    if not xpath_location_option:
-        raise Exception(f"Gagal pilih Location: {location} (mapping tidak ditemukan)")
-
-    if not retry_action(select_chosen_option, 3, driver, xpath_location_dropdown, xpath_location_option, f"Location: {location}"):
-        raise Exception(f"Gagal pilih Location: {location}")
+    with metrics.step("location"):
+        if not retry_action(select_chosen_option, 3, driver, xpath_location_dropdown, xpath_location_option,
+                            f"Location: {location}", xpath_location_container):
+            # Option tidak ketemu → urutan opsi mungkin berubah, scrape ulang index lalu coba sekali lagi
+            locations.invalidate()
+            xpath_location_option = locations.option_xpath(driver, location)
+            if not retry_action(select_chosen_option, 3, driver, xpath_location_dropdown, xpath_location_option,
+                                f"Location: {location}", xpath_location_container):
+                raise Exception(f"Gagal pilih Location: {location}")
+
+    with metrics.step("status"):
+        status_value = get_status_value(status)
+        if not retry_action(select_dropdown_by_value, 3, driver, xpath_status, status_value, f"Status: {status}"):
+            raise Exception(f"Gagal pilih Status: {status}")
+
+    with metrics.step("imei_input"):
+        trigger_elem = wait_visible_xpath(driver, xpath_rental_input)
+        if trigger_elem:
+            trigger_elem.click()
+            log("🖱️ Trigger IMEI diklik", "DEBUG", step="imei_trigger")
+            save_step(driver, "step_trigger_imei")
+        else:
+            raise Exception("Gagal menemukan input IMEI")
+
+        input_elem = driver.execute_script("return document.activeElement")
+        if input_elem:
+            force_input(driver, input_elem, imei, label="IMEI")
+            save_step(driver, "step_imei_input_active")
+            actions = ActionChains(driver)
+            actions.send_keys(Keys.F12).perform()
+            log("🎹 F12 dikirim setelah input IMEI untuk trigger dropdown", "DEBUG", step="imei_input")
+            readiness.wait_network_idle(driver, step="imei_autocomplete")
+        else:
+            raise Exception("Gagal ambil activeElement untuk input IMEI")
 
-    status_value = get_status_value(status)
-    if not retry_action(select_dropdown_by_value, 3, driver, xpath_status, status_value, f"Status: {status}"):
-        raise Exception(f"Gagal pilih Status: {status}")
+    with metrics.step("imei_suggestion"):
+        if not retry_action(click_suggestion, 3, driver, xpath_imei_suggestion):
+            raise Exception("Gagal klik Suggestion IMEI")
 
-    trigger_elem = wait_visible_xpath(driver, xpath_rental_input)
-    if trigger_elem:
-        trigger_elem.click()
-        log("🖱️ Trigger IMEI diklik")
-        save_step(driver, "step_trigger_imei")
-    else:
-        raise Exception("Gagal menemukan input IMEI")
-
-    input_elem = driver.execute_script("return document.activeElement")
-    if input_elem:
-        force_input(driver, input_elem, imei, label="IMEI")
-        save_step(driver, "step_imei_input_active")
-        actions = ActionChains(driver)
-        actions.send_keys(Keys.F12).perform()
-        log("🎹 F12 dikirim setelah input IMEI untuk trigger dropdown")
-        time.sleep(1)
-    else:
-        raise Exception("Gagal ambil activeElement untuk input IMEI")
-
-    if not retry_action(click_suggestion, 3, driver, xpath_imei_suggestion):
-        raise Exception("Gagal klik Suggestion IMEI")
+        try:
+            driver.execute_script("""const active = document.querySelector('.active-result'); if (active) active.click();""")
+            readiness.wait_chosen_closed(driver, get_xpath("imei_container"))
+            log("🧹 Dropdown aktif ditutup", "DEBUG", step="imei_suggestion")
+        except:
+            log("⚠️ Tidak ada dropdown aktif yang perlu ditutup", "DEBUG", step="imei_suggestion")
+
+    with metrics.step("submit"):
+        submit_elem = wait_visible_xpath(driver, xpath_submit)
+        if submit_elem:
+            driver.execute_script("arguments[0].scrollIntoView(true);", submit_elem)
+            driver.execute_script("arguments[0].click();", submit_elem)
+            log("🚀 Klik tombol Submit (force click)", "DEBUG", step="submit")
+            save_step(driver, "step_submit_force")
+        else:
+            raise Exception("Gagal menemukan tombol Submit")
 
-    try:
-        driver.execute_script("""const active = document.querySelector('.active-result'); if (active) active.click();""")
-        time.sleep(0.5)
-        log("🧹 Dropdown aktif ditutup")
-    except:
-        log("⚠️ Tidak ada dropdown aktif yang perlu ditutup")
-
-    submit_elem = wait_visible_xpath(driver, xpath_submit)
-    if submit_elem:
-        driver.execute_script("arguments[0].scrollIntoView(true);", submit_elem)
-        driver.execute_script("arguments[0].click();", submit_elem)
-        log("🚀 Klik tombol Submit (force click)")
-        save_step(driver, "step_submit_force")
-    else:
-        raise Exception("Gagal menemukan tombol Submit")
+    with metrics.step("after_submit"):
+        # Tunggu request submit selesai, bukan sleep 2 detik
+        try:
+            readiness.wait_network_idle(driver, step="after_submit")
+            error_text = driver.execute_script(
+                "const m = document.querySelector('.kn-message.is-error'); return m && m.offsetParent ? m.innerText : null;"
+            )
+        except Exception as e:
+            raise SubmitUncertain(f"Respon submit tidak terbaca: {type(e).__name__} - {e}") from e
+        if error_text:
+            raise Exception(f"Knack menolak submit: {error_text.strip()}")
 
-    log("🎉 Submit selesai, workflow sukses")
+    log("🎉 Submit selesai, workflow sukses", "DEBUG", step="submit")
     return True
 
 def get_gsheet_client(json_credential_path):
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(json_credential_path, scope)
-    client = gspread.authorize(creds)
-    return client
+    # Satu client per proses, semua call lewat token bucket kuota Sheets (sheets_client.py)
+    def authorize():
+        scope = [
+            "https://spreadsheets.google.com/feeds",
+            "https://www.googleapis.com/auth/drive"
+        ]
+        creds = ServiceAccountCredentials.from_json_keyfile_name(json_credential_path, scope)
+        return gspread.authorize(creds)
+    return shared_client(json_credential_path, authorize)
 
 def get_or_create_sheet(spreadsheet, sheet_name):
     try:
@@ -265,18 +399,17 @@ def ensure_log_columns(sheet):
     return headers
 
 def get_knack_account(sheet):
-    # Email di kolom I1 (kolom ke-9), Password di kolom K1 (kolom ke-11)
-    email = sheet.cell(1, 9).value.strip() if sheet.cell(1, 9).value else ""
-    password = sheet.cell(1, 11).value.strip() if sheet.cell(1, 11).value else ""
-    return email, password
+    # Email di kolom I1 (kolom ke-9), Password di kolom K1 (kolom ke-11), dibaca sekali jalan
+    return read_knack_account(sheet)
 
 def process_all_workers(sheet_url, json_credential_path, worker_sheets):
     client = get_gsheet_client(json_credential_path)
     spreadsheet = client.open_by_url(sheet_url)
 
-    driver = setup_driver(headless=True)
-    if not driver:
-        log("Driver gagal di-load, workflow dihentikan.")
+    try:
+        driver = setup_driver(headless=True)
+    except Exception as e:
+        log(f"Driver gagal di-load, workflow dihentikan: {type(e).__name__} - {e}")
         return
 
     def input_thread():
@@ -290,6 +423,7 @@ def process_all_workers(sheet_url, json_credential_path, worker_sheets):
     t = threading.Thread(target=input_thread, daemon=True)
     t.start()
 
+    writers = {}
     try:
         while not exit_flag:
             for sheet_name in worker_sheets:
@@ -297,6 +431,9 @@ def process_all_workers(sheet_url, json_credential_path, worker_sheets):
                 headers = ensure_log_columns(sheet)
                 logs_col = headers.index("Logs") + 1
                 ts_col = headers.index("TimeStamp") + 1
+                if sheet_name not in writers:
+                    writers[sheet_name] = result_writer(sheet, sheet_name, logs_col, ts_col)
+                writer = writers[sheet_name]
 
                 # Ambil email & password dari sheet
                 try:
@@ -312,7 +449,8 @@ def process_all_workers(sheet_url, json_credential_path, worker_sheets):
                     continue
                 log(f"{email} telah login di {sheet_name}")  # <-- Perbaikan log di sini
 
-                data = sheet.get_all_records()
+                with metrics.sheets_call(sheet_name, "get_all_records"):
+                    data = sheet.get_all_records()
                 for idx, row in enumerate(data, start=2):
                     imei = str(row.get("IMEI", "")).strip()
                     if not imei or str(row.get("Logs", "")).startswith("✅"):
@@ -326,17 +464,172 @@ def process_all_workers(sheet_url, json_credential_path, worker_sheets):
                         log_msg = f"❌ Error: {type(e).__name__} - {e}"
 
                     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    sheet.update_cell(idx, logs_col, log_msg)
-                    sheet.update_cell(idx, ts_col, timestamp)
+                    writer.add(idx, log_msg, timestamp)
                     log(f"[{sheet_name}] Row {idx-1} updated: {log_msg} at {timestamp}")
+                writer.flush()
 
             log("⏳ Menunggu data baru di semua worker sheets... (atau ketik 'q'+Enter untuk keluar)")
-            time.sleep(10)
+            time.sleep(POLL_INTERVAL)
     finally:
+        for writer in writers.values():
+            writer.close()
         driver.quit()
         log("🛑 Tutup browser")
 
-def worker_process(sheet_url, json_credential_path, sheet_name):
+def result_writer(sheet, sheet_name, logs_col, ts_col, **kwargs):
+    # Buffer write-back yang menandai ledger "written" setelah ✅ benar-benar masuk sheet
+    return SheetWriteBuffer(sheet, logs_col, ts_col, log_func=log,
+                            on_written=lambda rows: ledger.mark_written(sheet_name, rows), **kwargs)
+
+def run_row(backend, sheet_name, writer, idx, row):
+    # Submit satu row + hook backend, hasil masuk buffer writer sheet asalnya
+    imei = str(row.get("IMEI", "")).strip()
+    logs = str(row.get("Logs", ""))
+    # Cek ledger dulu: sudah sukses / duplikat / sisa crash → jangan submit lagi
+    known = ledger.resolve(imei, sheet_name, idx, logs)
+    if known is not None:
+        if known != logs:
+            writer.add(idx, known, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            log(f"[{sheet_name}] Row {idx-1} dari ledger: {known}", sheet=sheet_name, row=idx, imei=imei)
+            metrics.row_result("ledger")
+        return known
+
+    started = time.monotonic()
+    backend.begin_row(idx)
+    ledger.begin(imei, sheet_name, idx)
+    with logger.context(sheet=sheet_name, row=idx, imei=imei):
+        try:
+            backend.submit(row)
+        except SubmitUncertain as e:
+            # Record mungkin sudah ada di Knack: ledger tetap in_flight (tidak pasti), row diparkir sampai dicek
+            ledger.flag_uncertain(imei, sheet_name, idx)
+            log_msg = UNCERTAIN_MSG
+            log(f"[{sheet_name}] Row {idx-1} submit tidak pasti: {e}", "WARNING")
+            backend.row_failed()
+        except Exception as e:
+            # Transient → dijadwalkan ulang dengan backoff, permanent / kebanyakan gagal → diparkir (⛔)
+            if isinstance(e, SessionExpired):
+                backend.reauthenticate()
+            log_msg = retries.failed(sheet_name, idx, row, e)
+            ledger.finish(imei, sheet_name, idx, False, log_msg)
+            backend.row_failed()
+        else:
+            log_msg = "✅ Submit sukses"
+            ledger.finish(imei, sheet_name, idx, True, log_msg)
+            retries.succeeded(sheet_name, idx)
+            backend.row_succeeded()
+
+    duration = time.monotonic() - started
+    metrics.observe_step("row_total", duration)
+    if log_msg.startswith("✅"):
+        metrics.row_result("ok")
+    else:
+        metrics.row_result("parked" if log_msg.startswith(PARKED_PREFIX) else "error")
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    writer.add(idx, log_msg, timestamp)
+    log(f"[{sheet_name}] Row {idx-1} updated: {log_msg} at {timestamp}",
+        sheet=sheet_name, row=idx, imei=imei, duration=round(duration, 3))
+    return log_msg
+
+def validate_rows(sheet_name, writer, rows):
+    # Row yang pasti gagal (IMEI/Status/Location salah) langsung ditulis alasannya, tidak masuk browser
+    pending = [(idx, row) for idx, row in rows
+               if str(row.get("IMEI", "")).strip() and not str(row.get("Logs", "")).startswith("✅")]
+    accepted, rejected = row_validator.validate(pending)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for idx, row, reason in rejected:
+        # Alasan yang sama sudah ada di sheet → tidak perlu ditulis ulang tiap poll
+        if str(row.get("Logs", "")) == reason:
+            continue
+        writer.add(idx, reason, timestamp)
+        metrics.row_result("invalid")
+        log(f"[{sheet_name}] Row {idx-1} ditolak: {reason}", "WARNING",
+            sheet=sheet_name, row=idx, imei=str(row.get("IMEI", "")).strip())
+    return accepted
+
+def select_rows(sheet_name, writer, rows):
+    # Row valid yang boleh dikerjakan sekarang: yang diparkir / masih backoff dilewati,
+    # row baru didahulukan dari row yang sedang di-retry
+    rows = [(idx, row) for idx, row in validate_rows(sheet_name, writer, rows)
+            if retries.due(sheet_name, idx, row)]
+    return sorted(rows, key=lambda item: retries.is_retry(sheet_name, item[0]))
+
+def reconcile_sheet(reader, sheet_name, writer):
+    # Saat start: hasil di ledger yang belum sempat masuk sheet (crash sebelum write-back) ditulis dulu
+    fixed = 0
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for idx, row in validate_rows(sheet_name, writer, reader.poll()):
+        logs = str(row.get("Logs", ""))
+        known = ledger.resolve(row["IMEI"], sheet_name, idx, logs)
+        if known is not None and known != logs:
+            writer.add(idx, known, timestamp)
+            fixed += 1
+    writer.flush()
+    counts = ledger.counts(sheet_name)
+    log(f"[{sheet_name}] 📒 Ledger: {counts.get('submitted', 0)} submitted, {counts.get('failed', 0)} failed, "
+        f"{counts.get('in_flight', 0)} in-flight; {fixed} row disamakan ke sheet")
+
+def learn_locations(backend, sheet_name):
+    try:
+        row_validator.learn_locations(backend.location_names())
+    except Exception as e:
+        log(f"[{sheet_name}] ⚠️ Gagal ambil daftar location: {type(e).__name__} - {e}", "WARNING")
+
+def process_sheet_rows(reader, backend, sheet_name, writer, stop_event=None):
+    # Prefetch sheet, submit, dan write-back jalan bareng (pipeline.py).
+    # stop_event di-set saat drain (SIGTERM dari supervisor): row yang jalan diselesaikan dulu
+    RowPipeline(reader, backend, sheet_name, writer, select_rows, run_row, stop_event,
+                poll_interval=POLL_INTERVAL).run()
+
+def open_http_backend(sheet_name, email, password):
+    # Return None kalau backend http tidak dikonfigurasi / gagal login → fallback ke selenium
+    backend = HttpBackend.from_env()
+    if backend is None:
+        log(f"[{sheet_name}] ⚠️ KNACK_APP_ID kosong, fallback ke selenium")
+        return None
+    if not backend.login(email, password):
+        log(f"[{sheet_name}] ⚠️ Login API gagal, fallback ke selenium")
+        backend.close()
+        return None
+    log(f"{email} telah berhasil login API knack di {sheet_name}")
+    learn_locations(backend, sheet_name)
+    return backend
+
+def open_selenium_backend(sheet_name, email, password):
+    url = os.getenv("FORM_URL")
+    try:
+        driver = driver_pool.acquire()
+    except Exception as e:
+        log(f"[{sheet_name}] ERROR Chrome gagal dibuka: {e}")
+        return None
+
+    recorder = screenshots.attach(driver, sheet_name, SCREENSHOT_DIR)
+    backend = SeleniumBackend(driver, submit_row, login_knack_cached, url, recorder=recorder, pool=driver_pool)
+    if not backend.login(email, password):
+        log(f"[{sheet_name}] Login gagal, skip sheet ini")
+        close_selenium_backend(backend, sheet_name)
+        return None
+    log(f"{email} telah berhasil login knack di {sheet_name}")
+    learn_locations(backend, sheet_name)
+    return backend
+
+def close_selenium_backend(backend, sheet_name):
+    screenshots.detach(backend.driver)
+    driver_pool.discard(backend.driver)
+    log(f"🛑 Tutup browser untuk {sheet_name}")
+
+def run_http_backend(reader, sheet_name, email, password, writer, stop_event=None):
+    backend = open_http_backend(sheet_name, email, password)
+    if backend is None:
+        return False
+    try:
+        process_sheet_rows(reader, backend, sheet_name, writer, stop_event)
+        return True
+    finally:
+        backend.close()
+
+def worker_process(sheet_url, json_credential_path, sheet_name, stop_event=None):
+    logger.bind(worker=sheet_name, sheet=sheet_name)
     client = get_gsheet_client(json_credential_path)
     spreadsheet = client.open_by_url(sheet_url)
     sheet = get_or_create_sheet(spreadsheet, sheet_name)
@@ -356,68 +649,27 @@ def worker_process(sheet_url, json_credential_path, sheet_name):
         log(f"[{sheet_name}] Akun kosong, worker tidak dijalankan.")
         return
 
-    url = os.getenv("FORM_URL")
-    with tempfile.TemporaryDirectory(prefix=f"profile_{sheet_name}_") as profile_dir:
-        try:
-            driver = setup_driver(headless=True, profile_dir=profile_dir)
-        except Exception as e:
-            log(f"[{sheet_name}] ERROR Chrome gagal dibuka: {e}")
-            return
-
-        try:
-            if not login_knack(driver, url, email, password):
-                log(f"[{sheet_name}] Login gagal, skip sheet ini")
+    reader = IncrementalSheetReader(sheet, headers)
+    writer = result_writer(sheet, sheet_name, logs_col, ts_col)
+    try:
+        reconcile_sheet(reader, sheet_name, writer)
+        if SUBMIT_BACKEND == "http":
+            if run_http_backend(reader, sheet_name, email, password, writer, stop_event):
                 return
-            log(f"{email} telah berhasil login knack di {sheet_name}")
-            time.sleep(2)  # Jeda setelah login
-
-            while True:
-                data = sheet.get_all_records()
-                for idx, row in enumerate(data, start=2):
-                    imei = str(row.get("IMEI", "")).strip()
-                    if not imei or str(row.get("Logs", "")).startswith("✅"):
-                        continue
-
-                    log_msg = ""
-                    try:
-                        submit_row(driver, row)
-                        log_msg = "✅ Submit sukses"
-                        time.sleep(2)  # Jeda setelah submit
-                    except Exception as e:
-                        log_msg = f"❌ Error: {type(e).__name__} - {e}"
-                        time.sleep(2)  # Jeda setelah error
-
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    # Ganti dua update_cell jadi satu update
-                    sheet.update(f"{chr(64+logs_col)}{idx}:{chr(64+ts_col)}{idx}", [[log_msg, timestamp]])
-                    time.sleep(2)  # Jeda setelah update
-                    log(f"[{sheet_name}] Row {idx-1} updated: {log_msg} at {timestamp}")
+        run_selenium_backend(reader, sheet_name, email, password, writer, stop_event)
+    finally:
+        writer.close()
 
-                time.sleep(10)
-        finally:
-            driver.quit()
-            log(f"🛑 Tutup browser untuk {sheet_name}")
-
-def setup_driver(headless=True, profile_dir=None):
-    chrome_options = Options()
-    if headless:
-        chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    if profile_dir:
-        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    return driver
+def run_selenium_backend(reader, sheet_name, email, password, writer, stop_event=None):
+    backend = open_selenium_backend(sheet_name, email, password)
+    if backend is None:
+        return
+    try:
+        process_sheet_rows(reader, backend, sheet_name, writer, stop_event)
+    finally:
+        close_selenium_backend(backend, sheet_name)
 
 if __name__ == "__main__":
-    threads = []
-    for sheet_name in WORKER_SHEETS:
-        t = threading.Thread(target=worker_process, args=(SHEET_URL, JSON_CRED, sheet_name), daemon=True)
-        t.start()
-        threads.append(t)
-    # Tunggu semua thread selesai (atau tekan Ctrl+C untuk keluar)
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        log("🛑 Semua worker dihentikan oleh user")
+    # Worker sekarang dijalankan per proses oleh supervisor.py
+    import supervisor
+    supervisor.main()